@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Project: RandomPass
+
+Copyright 2018, Korvin F. Ezüst
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import string
+import subprocess
+import sys
+import time
+import tracemalloc
+from rndplib.constrained import constrained_password, split_classes
+from rndplib.generator import (
+    word_list,
+    word_index,
+    passphrase,
+    expanded_passphrase,
+    expanded_chars,
+    password)
+
+__author__ = "Korvin F. Ezüst"
+__copyright__ = "Copyright (c) 2018, Korvin F. Ezüst"
+__license__ = "Apache 2.0"
+__version__ = "1.0"
+__email__ = "dev@korvin.eu"
+__status__ = "Production"
+
+# Path of the command line program
+CLI = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                   "randompass.py")
+# Wall-clock budget of a character-only run of the CLI, in seconds
+STARTUP_BUDGET = 0.25
+# Stand-in word list, so the benchmarks don't need nltk
+WORDS = [f"word{i}" for i in range(10000)]
+# Characters or words per call
+SIZES = (8, 64, 1000, 10000, 100000, 1000000)
+# Command line arguments of every CLI mode, the words modes are skipped if
+# the word list is not downloaded
+CLI_MODES = {
+    "default": ["32"],
+    "alphanumeric": ["-a", "32"],
+    "binary": ["-b", "32"],
+    "octal": ["-o", "32"],
+    "decimal": ["-d", "32"],
+    "hexadecimal": ["-x", "32"],
+    "extra-characters": ["-e", "32"],
+    "words": ["-w", "8"],
+    "words-extra-characters": ["-w", "-e", "8"],
+}
+
+
+def cli_startup(args, runs=5):
+    """
+    Return the best wall-clock time of running the CLI
+
+    :param args: command line arguments
+    :type args: list
+    :param runs: number of runs
+    :type runs: int
+    :return: seconds
+    :rtype: float
+    """
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, CLI] + args, check=True,
+                       stdout=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def imports_nltk(args):
+    """
+    Tell if running the CLI with the given arguments imports nltk
+
+    :param args: command line arguments
+    :type args: list
+    :return: True if nltk got imported
+    :rtype: bool
+    """
+    code = ("import runpy, sys\n"
+            f"sys.argv = [{CLI!r}] + {args!r}\n"
+            f"runpy.run_path({CLI!r}, run_name='__main__')\n"
+            "sys.stderr.write(str('nltk' in sys.modules))\n")
+    out = subprocess.run([sys.executable, "-c", code], check=True,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    return out.stderr.decode().strip().endswith("True")
+
+
+def check_startup():
+    """Assert that character-only passwords start fast and without nltk"""
+    args = ["-x", "32"]
+    assert not imports_nltk(args), "character-only run imports nltk"
+    t = cli_startup(args)
+    print(f"startup {' '.join(args)}: {t * 1000:.1f} ms "
+          f"(budget {STARTUP_BUDGET * 1000:.0f} ms)", file=sys.stderr)
+    assert t < STARTUP_BUDGET, "character-only startup over budget"
+
+
+def timed(func, *args, runs=5):
+    """
+    Return the median wall-clock time of calling a function
+
+    :param func: function to time
+    :type func: collections.abc.Callable
+    :param args: arguments of func
+    :param runs: number of calls
+    :type runs: int
+    :return: seconds
+    :rtype: float
+    """
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def check_expanded_passphrase():
+    """Assert that expanded_passphrase() scales linearly with words"""
+    per_word = {}
+    for n in (64, 1000, 10000):
+        rd = passphrase(WORDS, n)
+        t = timed(expanded_passphrase, rd, n, [], runs=21)
+        per_word[n] = t / n
+        print(f"expanded_passphrase {n} words: {t * 1000:.2f} ms "
+              f"({per_word[n] * 1e6:.2f} us/word)", file=sys.stderr)
+    # The number of extra characters is random, leave room for noise
+    assert per_word[10000] < 4 * per_word[1000], \
+        "expanded_passphrase doesn't scale linearly"
+
+
+def peak_memory(func, *args):
+    """
+    Return the peak memory allocated while calling a function
+
+    :param func: function to measure
+    :type func: collections.abc.Callable
+    :param args: arguments of func
+    :return: bytes
+    :rtype: int
+    """
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(func, *args, runs=5):
+    """
+    Time a function and measure its memory peak
+
+    :param func: function to measure
+    :type func: collections.abc.Callable
+    :param args: arguments of func
+    :param runs: number of timed calls
+    :type runs: int
+    :return: median seconds and peak bytes
+    :rtype: dict
+    """
+    return {"seconds": timed(func, *args, runs=runs),
+            "peak_bytes": peak_memory(func, *args)}
+
+
+def bench_functions(sizes, runs):
+    """
+    Benchmark every generator entry point across sizes
+
+    :param sizes: characters or words per call
+    :type sizes: list
+    :param runs: number of timed calls per size
+    :type runs: int
+    :return: function name -> size -> measurement
+    :rtype: dict
+    """
+    results = {"password": {}, "expanded_chars": {}, "passphrase": {},
+               "expanded_passphrase": {}}
+    for n in sizes:
+        # Fewer runs for the large sizes to keep the whole thing short
+        r = max(1, runs * 1000 // max(n, 1000))
+        results["password"][n] = measure(
+            password, string.printable.strip(), n, runs=r)
+        cset = [chr(0x100 + i % 0xd000) for i in range(n)]
+        results["expanded_chars"][n] = measure(
+            expanded_chars, string.digits, cset, runs=r)
+        results["passphrase"][n] = measure(passphrase, WORDS, n, runs=r)
+        rd = passphrase(WORDS, n)
+        results["expanded_passphrase"][n] = measure(
+            expanded_passphrase, rd, n, [], runs=r)
+
+    # The real word list, if it's downloaded
+    try:
+        results["word_list"] = measure(word_list, runs=1)
+        results["word_index"] = measure(word_index, runs=runs)
+    except (ImportError, LookupError):
+        results["word_list"] = results["word_index"] = None
+    return results
+
+
+def bench_cli(runs):
+    """
+    Benchmark a cold start of the CLI in every mode
+
+    :param runs: number of runs per mode
+    :type runs: int
+    :return: mode -> best seconds, None if the mode is not available
+    :rtype: dict
+    """
+    results = {}
+    for mode, args in CLI_MODES.items():
+        try:
+            results[mode] = cli_startup(args, runs)
+        except subprocess.CalledProcessError:
+            results[mode] = None
+    return results
+
+
+def rejection_password(ch, n, minimums):
+    """
+    Generate passwords until one meets the minimums, the naive way
+
+    :param ch: character set
+    :type ch: str
+    :param n: number of characters
+    :type n: int
+    :param minimums: (characters, minimum) pairs
+    :type minimums: list
+    :return: password
+    :rtype: str
+    """
+    while True:
+        p = password(ch, n)
+        if all(sum(c in chars for c in p) >= m for chars, m in minimums):
+            return p
+
+
+def bench_constrained(runs):
+    """
+    Compare constrained_password() to generate-and-retry
+
+    One upper case letter, lower case letter, digit and punctuation mark
+    each, from the default character set.
+
+    :param runs: number of timed calls per length
+    :type runs: int
+    :return: length -> method -> seconds per password
+    :rtype: dict
+    """
+    ch = string.printable.strip()
+    classes = split_classes(ch, {"upper": 1, "lower": 1, "digits": 1,
+                                 "symbols": 1})
+    minimums = [(string.ascii_uppercase, 1), (string.ascii_lowercase, 1),
+                (string.digits, 1), (string.punctuation, 1)]
+    results = {}
+    # Many passwords per timed call, retries are random
+    batch = 1000
+    for n in (4, 6, 8, 16, 32):
+        results[n] = {
+            "one_pass": timed(lambda: [constrained_password(classes, n)
+                                       for _ in range(batch)],
+                              runs=runs) / batch,
+            "rejection": timed(lambda: [rejection_password(ch, n, minimums)
+                                        for _ in range(batch)],
+                               runs=runs) / batch,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark RandomPass and print the results as JSON")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES,
+                        help="characters or words per call")
+    parser.add_argument("--runs", type=int, default=5,
+                        help="timed runs per measurement")
+    parser.add_argument("--output", metavar="FILE",
+                        help="write the JSON to FILE")
+    parser.add_argument("--no-checks", action="store_true",
+                        help="skip the startup and scaling assertions")
+    args = parser.parse_args()
+
+    report = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "functions": bench_functions(args.sizes, args.runs),
+        "cli": bench_cli(args.runs),
+        "constrained": bench_constrained(args.runs),
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if not args.no_checks:
+        check_startup()
+        check_expanded_passphrase()
@@ -20,15 +20,20 @@ limitations under the License.
 """
 
 import argparse
-import string
+import os
 import sys
-from rndplib.generator import (
-    download_words,
-    word_list,
-    passphrase,
-    expanded_passphrase,
-    expanded_chars,
-    password)
+from rndplib import instrument
+from rndplib.engine import Generator
+from rndplib.hashing import check_cost, HASHERS, iter_hashed
+from rndplib.lengthindex import FILTERS
+from rndplib.generator import download_words
+from rndplib.output import FORMATS, write_items
+from rndplib.parallel import format_stats, iter_parallel
+from rndplib.pool import POOL_SIZE, SecretPool
+from rndplib.server import request, serve, socket_path
+from rndplib.unique import BloomFilter
+from rndplib.unique import format_stats as format_unique_stats
+from rndplib.wordsource import load_words
 
 __author__ = "Korvin F. Ezüst"
 __copyright__ = "Copyright (c) 2018, Korvin F. Ezüst"
@@ -37,14 +42,45 @@ __version__ = "1.0"
 __email__ = "dev@korvin.eu"
 __status__ = "Production"
 
+
+def get_words(source, mirror=None):
+    """
+    Return the words of a word list source, download the English word list
+    first if it's not available
+
+    :param source: word list source, see rndplib.wordsource
+    :type source: str
+    :param mirror: nltk data directory to copy the word list from
+    :type mirror: str
+    :return: words
+    :rtype: WordIndex or WordArray
+    """
+    with instrument.stage("word list"):
+        try:
+            return load_words(source or "nltk")
+        except LookupError:
+            download_words(mirror=mirror)
+            return load_words(source or "nltk")
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
-        usage="%(prog)s [-h|-a|-b|-o|-d|-x|-u] [-e] | [-w] [-e]] "
-              "number [custom-set]",
+        usage="%(prog)s [-h|-a|-b|-o|-d|-x|-u [-m DIR]] [-e] "
+              "[--min-CLASS N] | "
+              "[-w|-p [--wordlist SOURCE]] [--length CHARS] "
+              "[--shortest-word N] [--longest-word N] [--word-filter NAME] "
+              "[-e]] "
+              "[--min-entropy BITS] [-c COUNT] [--unique [--issued FILE]] "
+              "[--seed SEED [--start K]] "
+              "[--hash METHOD [--hash-cost COST]] [-O FILE] [-f FORMAT] "
+              "[-s SOCKET] [--stats|--stats-json] [--profile FILE] "
+              "[-j WORKERS] "
+              "number [custom-set] | [--pool SIZE] serve",
         description="Generate a random password or passphrase")
     parser.add_argument("number", nargs="?",
                         help="number of characters or words, a positive "
-                             "integer")
+                             "integer, or serve to run a generation server "
+                             "that keeps the word list loaded")
     parser.add_argument("custom_set", metavar="custom-set", nargs="*",
                         help="a custom set of characters")
     parser.add_argument("-a", "--alphanumeric", action="store_true",
@@ -59,14 +95,109 @@ if __name__ == "__main__":
                         help="use hexadecimal digits only")
     parser.add_argument("-w", "--words", action="store_true",
                         help="create passphrase from English words")
+    parser.add_argument("-p", "--pronounceable", action="store_true",
+                        help="create pronounceable password from letters "
+                             "that follow each other in English words")
+    parser.add_argument("--wordlist", metavar="SOURCE",
+                        help="create passphrase from the words of a text, "
+                             "gzip, Diceware, EFF or packed word list file, "
+                             "or learn the letters of -p from it")
+    parser.add_argument("--length", type=int, metavar="CHARS",
+                        help="create passphrase of exactly CHARS "
+                             "characters, spaces included, number of words "
+                             "is optional")
+    parser.add_argument("--shortest-word", type=int, default=1, metavar="N",
+                        help="use words of at least N characters")
+    parser.add_argument("--longest-word", type=int, metavar="N",
+                        help="use words of at most N characters")
+    parser.add_argument("--word-filter", action="append", default=[],
+                        choices=sorted(FILTERS), metavar="NAME",
+                        help="use only words of lower case letters, or "
+                             "without characters that are easily mistaken "
+                             "for each other, can be given more than once: "
+                             "%(choices)s")
     parser.add_argument("-e", "--extra-characters", action="store_true",
                         help="mix extra characters in. Use "
                              "custom-set if provided or fall back to "
                              "ASCII punctuation marks")
     parser.add_argument("-u", "--update-words", action="store_true",
                         help="update word list and exit")
+    parser.add_argument("-m", "--mirror", metavar="DIR",
+                        help="update word list from the nltk data "
+                             "directory DIR instead of downloading it")
+    for name, what in (("upper", "upper case letters"),
+                       ("lower", "lower case letters"),
+                       ("digits", "digits"),
+                       ("symbols", "ASCII punctuation marks"),
+                       ("custom", "characters of custom-set")):
+        parser.add_argument(f"--min-{name}", type=int, default=0,
+                            metavar="N",
+                            help=f"password has at least N {what}")
+    parser.add_argument("--min-entropy", type=float, metavar="BITS",
+                        help="use the fewest characters or words that give "
+                             "at least BITS bits of entropy, number is "
+                             "optional")
+    parser.add_argument("-c", "--count", type=int, default=1,
+                        help="number of passwords or passphrases to "
+                             "generate, one per line")
+    parser.add_argument("-O", "--output", metavar="FILE",
+                        help="write to FILE instead of standard output")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="lines",
+                        help="write one item per line, NUL-delimited, or "
+                             "as CSV or JSON Lines with the type, length "
+                             "and entropy of each (default: lines)")
+    parser.add_argument("-s", "--socket", default=socket_path(),
+                        help="socket of the generation server, used when "
+                             "it's running (default: %(default)s)")
+    parser.add_argument("--unique", action="store_true",
+                        help="make every password of the run unique and "
+                             "report the duplicates thrown away")
+    parser.add_argument("--issued", metavar="FILE",
+                        help="leave out the passwords of FILE, one per line "
+                             "or a saved Bloom filter, implies --unique")
+    parser.add_argument("--seed",
+                        help="generate a reproducible dataset from SEED for "
+                             "testing, the output is NOT secret")
+    parser.add_argument("--start", type=int, default=0, metavar="K",
+                        help="index of the first item of the seeded "
+                             "dataset (default: 0)")
+    parser.add_argument("--hash", choices=sorted(HASHERS),
+                        help="print a salted hash after each password or "
+                             "passphrase, separated by a tab, hashing in "
+                             "WORKERS processes")
+    parser.add_argument("--hash-cost", type=int, metavar="COST",
+                        help="log2 of the scrypt cost or the number of "
+                             "PBKDF2 rounds (default: 14 and 600000)")
+    parser.add_argument("--stats", action="store_true",
+                        help="report the time of each stage, random bytes "
+                             "used, items produced and peak memory on "
+                             "standard error")
+    parser.add_argument("--stats-json", action="store_true",
+                        help="report the same as JSON, implies --stats")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="write cProfile statistics to FILE")
+    parser.add_argument("--pool", type=int, default=POOL_SIZE,
+                        metavar="SIZE",
+                        help="secrets the generation server keeps ready per "
+                             "kind of request, 0 to turn off (default: "
+                             "%(default)s)")
+    parser.add_argument("-j", "--workers", type=int,
+                        help="generate in WORKERS processes and report "
+                             "the throughput of each, passwords with "
+                             "minimums and unique ones are only hashed "
+                             "in them")
     args = parser.parse_args()
 
+    # Measure only when asked for, it costs next to nothing otherwise
+    args.stats = args.stats or args.stats_json
+    if args.stats or args.profile:
+        instrument.enable(profile=bool(args.profile))
+
+    # Run the generation server
+    if args.number == "serve":
+        serve(args.socket, SecretPool(args.pool) if args.pool > 0 else None)
+        sys.exit()
+
     try:
         # Try to convert number to an integer
         num = int(args.number)
@@ -77,22 +208,45 @@ if __name__ == "__main__":
         # No positional argument is given
         if args.update_words:
             # update word list
-            download_words()
+            download_words(mirror=args.mirror)
             sys.exit()
+        elif args.min_entropy is not None or args.length:
+            # Length comes from the entropy target or the length in
+            # characters
+            num = 1
         else:
             parser.print_help()
             sys.exit()
 
-    # num can only be positive
-    if num <= 0:
+    # num and count can only be positive, start can't be negative
+    if num <= 0 or args.count <= 0 or (args.workers or 1) <= 0 or \
+            args.start < 0:
         parser.print_help()
         sys.exit()
 
+    # Check the hash cost here, not in every hashing process
+    if args.hash and args.hash_cost is not None:
+        try:
+            check_cost(args.hash, args.hash_cost)
+        except ValueError as e:
+            print(f"Can't hash: {e}.")
+            sys.exit()
+
+    # Word lengths, filters and a word list file imply words, unless the
+    # word list is for -p
+    word_lengths = None
+    if args.shortest_word != 1 or args.longest_word is not None:
+        word_lengths = (args.shortest_word, args.longest_word)
+    if (args.wordlist or args.length or word_lengths or args.word_filter) \
+            and not args.pronounceable:
+        args.words = True
+
     # sum int value of arguments: binary, octal, decimal, hexadecimal,
-    # alphanumeric, words and update-words
+    # alphanumeric, words, pronounceable and update-words
     exclusive_argument_count = sum(
         [args.binary, args.octal, args.decimal, args.hexadecimal,
-         args.alphanumeric, args.words, args.update_words])
+         args.alphanumeric, args.words, args.pronounceable,
+         args.update_words])
     # Print help message if there's two optional arguments given, except the
     # argument extra-characters
     if exclusive_argument_count > 1:
@@ -102,48 +256,146 @@ if __name__ == "__main__":
 
     # Make sure to update words even if number is provided
     if args.update_words and args.number:
-        download_words()
+        download_words(mirror=args.mirror)
+        sys.exit()
+
+    # Preset character set, the last one given wins
+    preset = "default"
+    for name in ("alphanumeric", "binary", "octal", "decimal",
+                 "hexadecimal"):
+        if getattr(args, name):
+            preset = name
+    # Extra characters, an empty custom set means ASCII punctuation marks
+    cset = args.custom_set if args.extra_characters else None
+    # Minimum counts of character classes, passwords only
+    minimums = {"upper": args.min_upper, "lower": args.min_lower,
+                "digits": args.min_digits, "symbols": args.min_symbols,
+                "custom": args.min_custom}
+
+    kind = "passphrase" if args.words else \
+        "pronounceable" if args.pronounceable else "password"
+    # Resolve everything once, download the word list if it's needed
+    try:
+        words = get_words(args.wordlist, args.mirror) \
+            if kind != "password" else None
+        gen = Generator(kind, None if args.number is None else num, preset,
+                        cset, minimums, args.min_entropy, args.wordlist,
+                        words if kind == "passphrase" else None,
+                        args.length, word_lengths, args.word_filter)
+    except ValueError as e:
+        if minimums and any(minimums.values()):
+            print(f"Can't meet the minimums: {e}.")
+        else:
+            print(f"Can't generate: {e}.")
+        sys.exit()
+    num = gen.number
+
+    # Report the length picked for the entropy target
+    if args.min_entropy is not None:
+        # Only a lower bound is known for expanded passphrases,
+        # pronounceable passwords have the min-entropy
+        unit = "characters," if gen.kind == "password" else \
+            "letters," if gen.kind == "pronounceable" else \
+            "words," if cset is None else "words, at least"
+        what = "min-entropy" if gen.kind == "pronounceable" else "entropy"
+        if gen.total_length:
+            num, unit = gen.total_length, "characters,"
+        print(f"{num} {unit} {gen.entropy:.1f} bits of {what}",
+              file=sys.stderr)
+
+    req = gen.request()
+    if args.seed is not None:
+        if args.unique or args.issued:
+            print("Seeded datasets can't be made unique.")
+            sys.exit()
+        print("Seeded mode: the output is reproducible and NOT secret.",
+              file=sys.stderr)
+        req["seed"] = args.seed
+        req["start"] = args.start
+    # Passphrases and passwords with minimums can't be deduplicated
+    if (args.unique or args.issued) and (gen.kind != "password" or
+                                         gen.classes):
+        print("Only passwords without minimums can be made unique.")
+        sys.exit()
+    # Those are generated in this process, the workers only hash them
+    if args.workers and not args.hash and (gen.classes or args.unique or
+                                           args.issued):
+        print("Passwords with minimums and unique ones can't be generated "
+              "in several processes.")
         sys.exit()
+    # Per worker throughput when generating in several processes
+    stats = None
 
-    # Passphrase from words
-    if args.words:
+    # Passwords with minimum counts or unique ones are generated here
+    items = None
+    unique_stats = None
+    if gen.classes and args.seed is not None:
+        items = gen.generate_seeded(args.seed, args.start, args.count)
+    elif gen.classes:
+        items = gen.generate_many(args.count)
+    elif args.unique or args.issued:
+        issued = BloomFilter.from_file(args.issued) if args.issued else None
+        unique_stats = {}
         try:
-            # Get word list
-            words = word_list()
-        except LookupError:
-            # Download if not available
-            download_words()
-            words = word_list()
+            items = gen.generate_unique(args.count, issued, unique_stats)
+        except ValueError as e:
+            print(f"Can't make the passwords unique: {e}.")
+            sys.exit()
 
-        # Print passphrase with or without extra chars
-        rnd = passphrase(words, num)
+    # Let the generation server do the work if it's running
+    if items is None and not args.workers and os.path.exists(args.socket):
+        try:
+            items = request(dict(req, count=args.count), args.socket)
+        except (OSError, ValueError):
+            # Fall back to generating here
+            pass
 
-        if args.extra_characters:
-            print(expanded_passphrase(rnd, num, args.custom_set))
+    # Generate in this process
+    if items is None and not args.workers:
+        if args.seed is not None:
+            items = gen.generate_seeded(args.seed, args.start, args.count)
         else:
-            print(rnd)
+            items = gen.generate_many(args.count)
+
+    # Spread the work over several processes
+    if items is None:
+        stats = {}
+        # Seeded items have to stay in order
+        items = iter_parallel(req, args.count, args.workers,
+                              ordered=args.seed is not None, stats=stats)
 
-    # Password from characters
+    # Hash the items in a pool of processes, hashing is the slow part
+    if args.hash:
+        items = iter_hashed(items, args.hash, args.hash_cost, args.workers)
+
+    # Write the items as they are generated, only csv and jsonl show the
+    # entropy
+    hashed = bool(args.hash)
+    entropy = gen.entropy if args.format in ("csv", "jsonl") else None
+    if args.output:
+        with open(args.output, "wb") as f:
+            write_items(items, f, args.format, gen.kind, entropy, hashed)
     else:
-        # Default characters
-        chars = string.printable.strip()  # without strip() it has white spaces
-
-        # Modify chars based on arguments
-        if args.alphanumeric:
-            chars = string.ascii_letters + string.digits
-        if args.binary:
-            chars = "01"
-        if args.octal:
-            chars = string.octdigits
-        if args.decimal:
-            chars = string.digits
-        if args.hexadecimal:
-            chars = string.hexdigits.upper()
-
-        # Add custom set of characters if any or fall back to ASCII
-        # punctuation marks
-        if args.extra_characters:
-            chars = expanded_chars(chars, args.custom_set)
-
-        # Generate and print the password
-        print(password(chars, num))
+        try:
+            write_items(items, sys.stdout.buffer, args.format, gen.kind,
+                        entropy, hashed)
+        except BrokenPipeError:
+            # The reader is gone, e.g. head, stop quietly. Python flushes
+            # stdout on exit, so point it at devnull first
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            sys.exit(1)
+
+    if args.profile:
+        instrument.dump_profile(args.profile)
+    if args.stats:
+        print(instrument.format_report(
+            instrument.report(), "json" if args.stats_json else "summary"),
+            file=sys.stderr)
+    if stats is not None:
+        print(format_stats(stats), file=sys.stderr)
+    if unique_stats is not None:
+        print(format_unique_stats(unique_stats), file=sys.stderr)
+        # Fewer passwords than asked for were written
+        if unique_stats.get("shortfall"):
+            sys.exit(1)
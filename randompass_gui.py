@@ -21,16 +21,16 @@ limitations under the License.
 
 from rndplib.license import full_license_text
 import tkinter as tk
+from tkinter import filedialog
 from tkinter import font
 from tkinter import messagebox
-from rndplib.generator import (
-    download_words,
-    word_list,
-    passphrase,
-    expanded_passphrase,
-    password
-)
-import string
+from rndplib.alphabet import PRESETS
+from rndplib.engine import Generator
+from rndplib.generator import download_words
+from rndplib.markov import pronounceable_model
+from rndplib.wordsource import load_words
+import queue
+import threading
 import webbrowser
 
 __author__ = "Korvin F. Ezüst"
@@ -125,7 +125,9 @@ class DescWindow(BasicWindow):
                "- decimal only -- digits from 0 to 9\n" \
                "- hexadecimal only -- digits from 0 to F\n" \
                "- words -- randomly chosen English words from a dictionary " \
-               "of over 236000 words\n\n" \
+               "of over 236000 words\n" \
+               "- pronounceable -- lower case letters that follow each " \
+               "other like they do in\n  English words\n\n" \
                "You can add your own characters to each and have the " \
                "program randomly pick\nfrom those as well. In case of a " \
                "passphrase, a random number of them will be\npicked and " \
@@ -256,6 +258,23 @@ class MainWindow(BasicWindow):
         self.words = tk.Radiobutton(
             self, text="Words", variable=self.pass_type, value="words")
         self.words.grid(row=7, column=0, sticky="W")
+        # Radio button
+        self.pronounceable = tk.Radiobutton(
+            self,
+            text="Pronounceable",
+            variable=self.pass_type,
+            value="pronounceable")
+        self.pronounceable.grid(row=8, column=0, sticky="W")
+
+        # Word list selector, empty means the English word list
+        self.wframe = tk.Frame(self)
+        self.wframe.grid(row=9, column=0, sticky="WE", padx=10)
+        tk.Label(self.wframe, text="Word list:").grid(row=0, column=0)
+        self.wordlist = tk.Entry(self.wframe)
+        self.wordlist.grid(row=0, column=1)
+        self.browse = tk.Button(
+            self.wframe, text="Browse...", command=self.browse_words)
+        self.browse.grid(row=0, column=2)
 
         # Extra option selector
         # Label
@@ -326,6 +345,23 @@ class MainWindow(BasicWindow):
         self.exit_button = tk.Button(self, text="Exit", command=self.destroy)
         self.exit_button.grid(row=12, column=1, pady=20)
 
+        # Word list and its source, loaded in the background
+        self.word_list = None
+        self.word_source = None
+        # Sources whose letter model is trained and cached
+        self.model_sources = set()
+        # Messages from the loader thread, polled with after()
+        self.messages = queue.Queue()
+        self.loader = None
+        # Generate a passphrase as soon as the word list is loaded
+        self.pending = False
+        # Update the word list once the running loader is done
+        self.update_requested = False
+        # The output field shows a status message, not a password
+        self.status_shown = False
+        self.start_loader()
+        self.poll_messages()
+
     def increment(self):
         """Increment number by one"""
         try:
@@ -358,44 +394,18 @@ class MainWindow(BasicWindow):
         """Generate password or passphrase"""
         # Clear text field
         self.pass_out.delete("0.0", tk.END)
+        self.status_shown = False
         # Get password type and extra option
         t = self.pass_type.get()
         o = self.option.get()
-
-        if t == "alphanumeric":
-            chars = string.ascii_letters + string.digits
-            if o == "ASCII":
-                chars += string.punctuation
-            elif o == "custom":
-                chars += self.input.get()
-        elif t == "binary":
-            chars = "01"
-            if o == "ASCII":
-                chars += string.punctuation
-            elif o == "custom":
-                chars += self.input.get()
-        elif t == "octal":
-            chars = string.octdigits
-            if o == "ASCII":
-                chars += string.punctuation
-            elif o == "custom":
-                chars += self.input.get()
-        elif t == "decimal":
-            chars = string.digits
-            if o == "ASCII":
-                chars += string.punctuation
-            elif o == "custom":
-                chars += self.input.get()
-        elif t == "hexadecimal":
-            chars = string.hexdigits.upper()
-            if o == "ASCII":
-                chars += string.punctuation
-            elif o == "custom":
-                chars += self.input.get()
+        # Extra characters, an empty tuple means ASCII punctuation marks
+        if o == "ASCII":
+            extra = ()
+        elif o == "custom" and self.input.get():
+            extra = tuple(self.input.get())
         else:
-            chars = string.printable.strip()
-            if o == "custom":
-                chars += self.input.get()
+            extra = None
+
         # Convert number to int or print error message and set it to zero
         try:
             n = int(self.number.get())
@@ -404,52 +414,137 @@ class MainWindow(BasicWindow):
         except ValueError:
             self.pass_out.insert("0.0", "INVALID NUMBER")
             n = 0
+        # If n <= zero, there's nothing to do
+        if n <= 0:
+            return
 
-        # Type is password
-        if t != "words":
-            # If n <= zero, there's nothing to do
-            if n > 0:
-                # Print password
-                self.pass_out.insert("0.0", password(chars, n))
+        # Type is password, the type is the preset
+        if t not in ("words", "pronounceable"):
+            gen = Generator("password", n, t if t in PRESETS else "default",
+                            extra)
 
-        # Type is passphrase
+        # Type is passphrase or pronounceable password, both need the
+        # word list
         else:
-            # Get word list
+            # Word list is still loading or another one is selected,
+            # generate when it's ready
+            source = self.wordlist.get().strip()
+            if self.word_list is None or source != self.word_source:
+                self.show_status("LOADING WORD LIST...")
+                self.pending = True
+                self.start_loader()
+                return
+            # Don't train the letter model on the Tk thread
+            if t == "pronounceable" and source not in self.model_sources:
+                self.show_status("BUILDING LETTER MODEL...")
+                self.pending = True
+                self.start_loader()
+                return
             try:
-                w = word_list()
-            except LookupError:
-                self.pass_out.insert("0.0", "DOWNLOADING WORD LIST...")
-                self.update_idletasks()
-                download_words()
-                self.pass_out.delete("0.0", tk.END)
-                w = word_list()
-
-            # Set value of ext based on selected extra option
-            if o == "ASCII":
-                ext = string.punctuation
-            elif o == "custom":
-                ext = self.input.get()
-            else:
-                ext = ""
-            # The function expanded_passphrase needs a list
-            ext = [i for i in ext]
-            # Get passphrase
-            p = passphrase(w, n)
-            # If n == zero, nothing to do
-            if n > 0:
-                # Expand passphrase with characters from ext if any
-                if len(ext) > 0:
-                    p = expanded_passphrase(p, n, ext)
-                # Print passphrase
-                self.pass_out.insert("0.0", p)
+                if t == "words":
+                    gen = Generator("passphrase", n, extra=extra,
+                                    wordlist=source, words=self.word_list)
+                else:
+                    gen = Generator("pronounceable", n, extra=extra,
+                                    wordlist=source)
+            except ValueError as e:
+                self.pass_out.insert("0.0", str(e).upper())
+                return
+
+        # Print password or passphrase
+        self.pass_out.insert("0.0", gen.generate())
 
     def update_words(self):
         """Update word list"""
+        self.show_status("UPDATING WORD LIST...")
+        self.model_sources.clear()
+        self.start_loader(update=True)
+
+    def show_status(self, msg):
+        """Show a status message in the output field"""
         self.pass_out.delete("0.0", tk.END)
-        self.pass_out.insert("0.0", "UPDATING WORD LIST...")
-        self.update_idletasks()
-        download_words()
-        self.pass_out.delete("0.0", tk.END)
+        self.pass_out.insert("0.0", msg)
+        self.status_shown = True
+
+    def browse_words(self):
+        """Pick a word list file"""
+        path = filedialog.askopenfilename(title="Word list")
+        if path:
+            self.wordlist.delete("0", tk.END)
+            self.wordlist.insert("0", path)
+
+    def start_loader(self, update=False):
+        """
+        Load the selected word list on a worker thread, download the
+        English word list first if asked to or if it's not available
+
+        :param update: download the word list even if it's available
+        :type update: bool
+        """
+        if self.loader is not None and self.loader.is_alive():
+            self.update_requested = self.update_requested or update
+            return
+        source = self.wordlist.get().strip()
+        # Train the letter model here too, it takes a while the first time
+        model = self.pass_type.get() == "pronounceable"
+
+        def progress(msg):
+            """Report a download step, called on the loader thread"""
+            self.messages.put(("progress", msg))
+
+        def work():
+            """Runs on the loader thread, never touches Tk"""
+            try:
+                if update:
+                    download_words(progress)
+                    load_words.cache_clear()
+                    pronounceable_model.cache_clear()
+                try:
+                    w = load_words(source or "nltk")
+                except LookupError:
+                    download_words(progress)
+                    w = load_words(source or "nltk")
+                if model:
+                    progress("BUILDING LETTER MODEL...")
+                    pronounceable_model(source or "nltk")
+                self.messages.put(("words", (source, w, model)))
+            except Exception as e:
+                self.messages.put(("error", f"WORD LIST ERROR: {e}"))
+
+        self.loader = threading.Thread(target=work, daemon=True)
+        self.loader.start()
+
+    def poll_messages(self):
+        """Show loader progress and pick up the loaded word list"""
+        try:
+            while True:
+                kind, value = self.messages.get_nowait()
+                if kind == "words":
+                    # The loader is done, so a pending generate() can
+                    # start another one
+                    self.loader.join()
+                    self.word_source, self.word_list, model = value
+                    if model:
+                        self.model_sources.add(self.word_source)
+                    if self.status_shown:
+                        self.pass_out.delete("0.0", tk.END)
+                        self.status_shown = False
+                    if self.update_requested:
+                        self.update_requested = False
+                        self.update_words()
+                    elif self.pending:
+                        self.pending = False
+                        self.generate()
+                else:
+                    if kind == "error":
+                        self.pending = False
+                    # Don't overwrite a generated password
+                    empty = not self.pass_out.get("0.0", tk.END).strip()
+                    if self.status_shown or empty or kind == "error":
+                        self.show_status(value)
+        except queue.Empty:
+            pass
+        self.after(100, self.poll_messages)
 
     @staticmethod
     def pop_up(tt, tx):
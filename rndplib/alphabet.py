@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Project: RandomPass
+
+Copyright 2018, Korvin F. Ezüst
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from array import array
+from functools import lru_cache
+import string
+
+__author__ = "Korvin F. Ezüst"
+__copyright__ = "Copyright (c) 2018, Korvin F. Ezüst"
+__license__ = "Apache 2.0"
+__version__ = "1.0"
+__email__ = "dev@korvin.eu"
+__status__ = "Production"
+
+# Character sets selectable from the CLI and GUI
+PRESETS = {
+    "default": string.printable.strip(),  # without strip() it has spaces
+    "alphanumeric": string.ascii_letters + string.digits,
+    "binary": "01",
+    "octal": string.octdigits,
+    "decimal": string.digits,
+    "hexadecimal": string.hexdigits.upper(),
+}
+
+
+class Alphabet:
+    """
+    Immutable character set prepared for unbiased sampling
+
+    Duplicates are removed keeping the first occurrence, so the order is
+    the same on every run. Random values are drawn one byte per character
+    for sets up to 256 characters and two bytes per character above that.
+    Values from limit upwards are rejected, so every character is equally
+    likely.
+
+    :param ch: characters
+    :type ch: str
+    """
+
+    __slots__ = ("chars", "codepoints", "width", "limit", "reject", "table")
+
+    def __init__(self, ch):
+        chars = "".join(dict.fromkeys(ch))
+        if not chars:
+            raise ValueError("empty character set")
+        k = len(chars)
+        # Random bytes per character
+        width = 1 if k <= 256 else 2
+        span = 1 << (8 * width)
+        if k > span:
+            raise ValueError("character set is too large")
+        # Largest multiple of k a random value can take, values at or above
+        # it would favour the first span % k characters
+        limit = span - span % k
+        set_ = super().__setattr__
+        set_("chars", chars)
+        set_("codepoints", array("I", map(ord, chars)))
+        set_("width", width)
+        set_("limit", limit)
+        # Bytes to delete before mapping, only used when width is 1
+        set_("reject", bytes(range(limit, 256)) if width == 1 else b"")
+        # Random value -> character
+        set_("table", [chars[i % k] for i in range(limit)])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Alphabet is immutable")
+
+    def __len__(self):
+        return len(self.chars)
+
+    def __eq__(self, other):
+        return isinstance(other, Alphabet) and self.chars == other.chars
+
+    def __hash__(self):
+        return hash(self.chars)
+
+    def __repr__(self):
+        return f"Alphabet({self.chars!r})"
+
+
+@lru_cache(maxsize=256)
+def from_chars(ch):
+    """
+    Return the Alphabet of a character string, built once per string
+
+    :param ch: characters
+    :type ch: str
+    :return: alphabet
+    :rtype: Alphabet
+    """
+    return Alphabet(ch)
+
+
+@lru_cache(maxsize=256)
+def alphabet(preset="default", extra=None):
+    """
+    Return the Alphabet of a preset with extra characters, built once per
+    combination
+
+    :param preset: key of PRESETS
+    :type preset: str
+    :param extra: extra characters, an empty tuple means ASCII punctuation
+        marks like the -e option of the CLI, None means no extra characters
+    :type extra: tuple
+    :return: alphabet
+    :rtype: Alphabet
+    """
+    ch = PRESETS[preset]
+    if extra is not None:
+        ch += "".join(extra) or string.punctuation
+    return from_chars(ch)
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Project: RandomPass
+
+Copyright 2018, Korvin F. Ezüst
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Passwords with a minimum number of characters from each class
+
+The password is drawn uniformly from all passwords of the given length
+that meet the minimums, in one pass: the number of characters of each
+class is drawn with the exact probability of that split, the class of
+each position is shuffled, then the characters are filled in.
+"""
+
+from bisect import bisect_right
+from functools import lru_cache
+from math import factorial
+import string
+from rndplib.entropy import bits, password_length
+from rndplib.generator import system_random
+
+__author__ = "Korvin F. Ezüst"
+__copyright__ = "Copyright (c) 2018, Korvin F. Ezüst"
+__license__ = "Apache 2.0"
+__version__ = "1.0"
+__email__ = "dev@korvin.eu"
+__status__ = "Production"
+
+# Character classes with a minimum count, other characters of the set go
+# into a class without one
+CLASSES = ("custom", "upper", "lower", "digits", "symbols")
+
+
+def split_classes(ch, minimums, custom=""):
+    """
+    Split a character set into disjoint classes
+
+    Characters of the custom set form the custom class, the rest is split
+    into ASCII upper case letters, lower case letters, digits, punctuation
+    marks and everything else. Classes without a minimum are merged into
+    one, the last, since only the minimums need counting.
+
+    :param ch: character set
+    :type ch: str
+    :param minimums: class name -> minimum count, see CLASSES
+    :type minimums: dict
+    :param custom: custom characters
+    :type custom: str
+    :raise ValueError: a class with a minimum has no characters
+    :return: (characters, minimum) per class
+    :rtype: tuple
+    """
+    members = {name: [] for name in CLASSES + ("other",)}
+    tests = (("upper", string.ascii_uppercase),
+             ("lower", string.ascii_lowercase),
+             ("digits", string.digits),
+             ("symbols", string.punctuation))
+    for c in dict.fromkeys(ch):
+        if c in custom:
+            members["custom"].append(c)
+            continue
+        for name, chars in tests:
+            if c in chars:
+                members[name].append(c)
+                break
+        else:
+            members["other"].append(c)
+
+    classes = []
+    rest = []
+    for name, chars in members.items():
+        minimum = minimums.get(name, 0)
+        if minimum > 0 and not chars:
+            raise ValueError(f"no {name} characters in the set")
+        if minimum > 0:
+            classes.append(("".join(chars), minimum))
+        else:
+            rest += chars
+    if rest:
+        classes.append(("".join(rest), 0))
+    return tuple(classes)
+
+
+@lru_cache(maxsize=64)
+def _tables(sizes, minimums, n):
+    """
+    Count the passwords meeting the minimums
+
+    ways[i][j] is the number of ways to fill j positions with classes i and
+    up, meeting their minimums. cumulative[i][j] holds the running sums of
+    its terms, one per number of characters of class i, for bisect(). Only
+    j = n is filled in for the first class, the only one asked about.
+    """
+    k = len(sizes)
+    ways = [None] * k + [[1] + [0] * n]
+    cumulative = [None] * k
+    for i in range(k - 1, -1, -1):
+        size, minimum, below = sizes[i], minimums[i], ways[i + 1]
+        powers = [1]
+        for _ in range(n):
+            powers.append(powers[-1] * size)
+        row = [0] * (n + 1)
+        sums_row = [None] * (n + 1)
+        for j in range(n + 1) if i else (n,):
+            if i == k - 1:
+                # The last class takes every position left
+                row[j] = powers[j] if j >= minimum else 0
+                sums_row[j] = [0] * (j - minimum) + [row[j]]
+                continue
+            total = 0
+            sums = []
+            # Running binomial coefficient, choose c of j positions
+            binom = 1
+            for c in range(j + 1):
+                if c >= minimum:
+                    if below[j - c]:
+                        total += binom * powers[c] * below[j - c]
+                    sums.append(total)
+                binom = binom * (j - c) // (c + 1)
+            row[j] = total
+            sums_row[j] = sums
+        ways[i] = row
+        cumulative[i] = sums_row
+    return ways, cumulative
+
+
+def constrained_entropy(classes, n):
+    """
+    Return the entropy of a constrained password
+
+    :param classes: (characters, minimum) per class, see split_classes()
+    :type classes: tuple
+    :param n: number of characters
+    :type n: int
+    :return: bits
+    :rtype: float
+    """
+    sizes = tuple(len(c) for c, _ in classes)
+    minimums = tuple(m for _, m in classes)
+    total = _tables(sizes, minimums, n)[0][0][n]
+    if not total:
+        raise ValueError("the minimums don't fit in the password")
+    return bits(total)
+
+
+def constrained_length(target, classes):
+    """
+    Return the shortest constrained password reaching an entropy target
+
+    :param target: bits
+    :type target: float
+    :param classes: (characters, minimum) per class, see split_classes()
+    :type classes: tuple
+    :return: number of characters
+    :rtype: int
+    """
+    # The constraints only take entropy away, start from the plain length
+    size = sum(len(c) for c, _ in classes)
+    n = max(password_length(target, size), sum(m for _, m in classes))
+    while constrained_entropy(classes, n) < target:
+        n += 1
+    return n
+
+
+def constrained_password(classes, n, rng=None):
+    """
+    Generate a password meeting the minimum of every class
+
+    :param classes: (characters, minimum) per class, see split_classes()
+    :type classes: tuple
+    :param n: number of characters
+    :type n: int
+    :param rng: source of randrange(), the OS CSPRNG if None, see
+        rndplib.seeded
+    :type rng: random.Random or SeededRandom
+    :raise ValueError: the minimums don't fit in the password
+    :return: password
+    :rtype: str
+    """
+    sizes = tuple(len(c) for c, _ in classes)
+    minimums = tuple(m for _, m in classes)
+    ways, cumulative = _tables(sizes, minimums, n)
+    if not ways[0][n]:
+        raise ValueError("the minimums don't fit in the password")
+
+    # Draw the number of characters of each class, weighted by the number
+    # of passwords with that split. Every step passes on a uniform
+    # remainder, so one random number is enough.
+    counts = []
+    left = n
+    randrange = (rng or system_random).randrange
+    r = randrange(ways[0][n])
+    for i in range(len(classes)):
+        sums = cumulative[i][left]
+        t = bisect_right(sums, r)
+        c = minimums[i] + t
+        if t:
+            r -= sums[t - 1]
+        left -= c
+        r %= ways[i + 1][left]
+        counts.append(c)
+
+    # One random number covers the order of the classes and the characters
+    space = factorial(n)
+    for size, c in zip(sizes, counts):
+        space *= size ** c
+    r = randrange(space)
+    # Shuffle which class goes where (Fisher-Yates with the digits of r)
+    layout = [i for i, c in enumerate(counts) for _ in range(c)]
+    for j in range(n - 1, 0, -1):
+        r, k = divmod(r, j + 1)
+        layout[j], layout[k] = layout[k], layout[j]
+    # Fill in the characters
+    out = []
+    for i in layout:
+        r, k = divmod(r, sizes[i])
+        out.append(classes[i][0][k])
+    return "".join(out)
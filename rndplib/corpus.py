@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Project: RandomPass
+
+Copyright 2018, Korvin F. Ezüst
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from rndplib.wordindex import write_atomic
+
+__author__ = "Korvin F. Ezüst"
+__copyright__ = "Copyright (c) 2018, Korvin F. Ezüst"
+__license__ = "Apache 2.0"
+__version__ = "1.0"
+__email__ = "dev@korvin.eu"
+__status__ = "Production"
+
+# nltk corpora the word list is made of
+CORPORA = ("words", "stopwords")
+# Seconds a reader waits before looking for a missing corpus once more,
+# an update may be moving it into place, see _install()
+RETRY_DELAY = 0.1
+
+
+def data_dir():
+    """
+    Return the nltk data directory owned by RandomPass
+
+    It has the same layout as any nltk data directory, so nltk finds the
+    corpora once it's on nltk.data.path.
+
+    :return: path of the data directory
+    :rtype: str
+    """
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(
+        os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "randompass", "nltk_data")
+
+
+def _manifest_path():
+    return os.path.join(data_dir(), "manifest.json")
+
+
+def manifest():
+    """
+    Return the content hashes of the installed corpora
+
+    :return: corpus name -> SHA-256 hex digest
+    :rtype: dict
+    """
+    try:
+        with open(_manifest_path()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(m):
+    """Replace the manifest in one step"""
+    write_atomic(_manifest_path(),
+                 (json.dumps(m, indent=2, sort_keys=True).encode(),))
+
+
+def tree_hash(path):
+    """
+    Return the SHA-256 of every file name and content under a directory
+
+    :param path: directory
+    :type path: str
+    :return: hex digest
+    :rtype: str
+    """
+    h = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        # Walk in a stable order
+        dirs.sort()
+        for name in sorted(files):
+            full = os.path.join(root, name)
+            h.update(os.path.relpath(full, path).encode("utf-8") + b"\0")
+            with open(full, "rb") as f:
+                for block in iter(lambda: f.read(1 << 16), b""):
+                    h.update(block)
+    return h.hexdigest()
+
+
+def _fetch(name, stage, mirror):
+    """
+    Put a fresh copy of a corpus at stage/name
+
+    :param name: corpus name
+    :type name: str
+    :param stage: empty staging directory
+    :type stage: str
+    :param mirror: nltk data directory to copy from, download with nltk if
+        None
+    :type mirror: str
+    :raise OSError: the corpus could not be fetched
+    """
+    if mirror is None:
+        # nltk is slow to import, only load it when words are needed
+        import nltk
+        if not nltk.download(name, download_dir=stage, quiet=True):
+            raise OSError(f"could not download {name}")
+        src = os.path.join(stage, "corpora", name)
+        os.replace(src, os.path.join(stage, name))
+        return
+
+    src = os.path.join(mirror, "corpora", name)
+    if os.path.isdir(src):
+        shutil.copytree(src, os.path.join(stage, name))
+    elif os.path.isfile(src + ".zip"):
+        # The zip holds the corpus directory itself
+        with zipfile.ZipFile(src + ".zip") as z:
+            z.extractall(stage)
+    else:
+        raise OSError(f"{name} not found in {mirror}")
+
+
+def _install(src, dst):
+    """
+    Move a staged corpus into place
+
+    The old copy is renamed aside first and removed afterwards, so readers
+    never see a partial corpus. Between the two renames there is no corpus
+    at all for a moment, readers look again after RETRY_DELAY when it's
+    missing.
+    """
+    old = f"{dst}.{os.getpid()}.old"
+    if os.path.exists(dst):
+        os.replace(dst, old)
+    os.replace(src, dst)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def update(mirror=None, progress=None):
+    """
+    Refresh the corpora in data_dir() if their content changed
+
+    Each corpus is fetched into a staging directory and hashed. Only the
+    ones that differ from the installed copy get installed. Corpora in
+    other nltk data directories are left alone.
+
+    :param mirror: nltk data directory to copy from instead of downloading
+    :type mirror: str
+    :param progress: called with a short description of each step
+    :type progress: collections.abc.Callable
+    :return: names of the corpora that changed
+    :rtype: list
+    """
+    corpora = os.path.join(data_dir(), "corpora")
+    os.makedirs(corpora, exist_ok=True)
+    m = manifest()
+    changed = []
+    for name in CORPORA:
+        if progress:
+            progress(f"DOWNLOADING {name.upper()}...")
+        # Stage on the same file system so the move into place is a rename
+        stage = tempfile.mkdtemp(prefix=".stage-", dir=data_dir())
+        try:
+            _fetch(name, stage, mirror)
+            digest = tree_hash(os.path.join(stage, name))
+            dst = os.path.join(corpora, name)
+            if m.get(name) != digest or not os.path.isdir(dst):
+                _install(os.path.join(stage, name), dst)
+                m[name] = digest
+                changed.append(name)
+        finally:
+            shutil.rmtree(stage, ignore_errors=True)
+    if changed:
+        _write_manifest(m)
+    return changed
+
+
+def use_data_dir():
+    """Make nltk look in data_dir() before its default locations"""
+    import nltk
+    if data_dir() not in nltk.data.path:
+        nltk.data.path.insert(0, data_dir())
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Project: RandomPass
+
+Copyright 2018, Korvin F. Ezüst
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Library interface
+
+A Generator holds one configuration, e.g.
+
+  gen = Generator("password", 16, preset="alphanumeric", extra=())
+  gen.generate()
+
+The preset, extra characters, minimums, entropy target and word list are
+resolved once when it's made. It can't be changed afterwards and only
+reads its state, so one Generator can be shared between threads.
+"""
+
+import string
+from rndplib.alphabet import alphabet, PRESETS
+from rndplib.constrained import (
+    constrained_entropy,
+    constrained_length,
+    constrained_password,
+    split_classes)
+from rndplib.entropy import (
+    passphrase_entropy,
+    passphrase_length,
+    password_entropy,
+    password_length)
+from rndplib.generator import (
+    expanded_passphrase,
+    iter_passphrases,
+    iter_passwords,
+    passphrase,
+    password)
+from rndplib.lengthindex import length_index
+from rndplib.markov import pronounceable_model
+from rndplib.seeded import (
+    iter_seeded_passphrases,
+    iter_seeded_passwords,
+    SeededRandom)
+from rndplib.unique import iter_unique_passwords
+from rndplib.wordsource import absolute_source, load_words
+
+__author__ = "Korvin F. Ezüst"
+__copyright__ = "Copyright (c) 2018, Korvin F. Ezüst"
+__license__ = "Apache 2.0"
+__version__ = "1.0"
+__email__ = "dev@korvin.eu"
+__status__ = "Production"
+
+KINDS = ("password", "passphrase", "pronounceable")
+
+
+class Generator:
+    """
+    Immutable, thread-safe generator of one kind of password or passphrase
+
+    :param kind: "password", "passphrase" or "pronounceable", see
+        rndplib.markov
+    :type kind: str
+    :param number: number of characters or words, can be left out with
+        min_entropy, or with total_length for any number of words
+    :type number: int
+    :param preset: key of rndplib.alphabet.PRESETS, passwords only
+    :type preset: str
+    :param extra: extra characters, an empty sequence means ASCII
+        punctuation marks, None means none, like the -e option of the CLI,
+        not for pronounceable passwords
+    :type extra: collections.abc.Iterable
+    :param minimums: class name -> minimum count, passwords only, see
+        rndplib.constrained.CLASSES
+    :type minimums: dict
+    :param min_entropy: raise number until the entropy reaches this many
+        bits, the min-entropy for pronounceable passwords
+    :type min_entropy: float
+    :param wordlist: word list source of passphrases and of the letter
+        model of pronounceable passwords, see rndplib.wordsource
+    :type wordlist: str
+    :param words: word list already loaded, instead of wordlist,
+        passphrases only
+    :type words: list, WordIndex or WordArray
+    :param total_length: passphrase of exactly this many characters,
+        spaces included, see rndplib.lengthindex
+    :type total_length: int
+    :param word_lengths: shortest and longest word of passphrases, the
+        longest can be None
+    :type word_lengths: tuple
+    :param word_filters: keys of rndplib.lengthindex.FILTERS the words of
+        passphrases must pass
+    :type word_filters: tuple
+    :raise LookupError: the English word list is not downloaded
+    :raise ValueError: invalid configuration
+    """
+
+    __slots__ = ("kind", "number", "preset", "extra", "wordlist",
+                 "total_length", "word_lengths", "word_filters", "alphabet",
+                 "classes", "words", "cset", "model", "_entropy")
+
+    def __init__(self, kind="password", number=None, preset="default",
+                 extra=None, minimums=None, min_entropy=None, wordlist=None,
+                 words=None, total_length=None, word_lengths=None,
+                 word_filters=()):
+        if kind not in KINDS:
+            raise ValueError(f"unknown kind {kind}")
+        if preset not in PRESETS:
+            raise ValueError(f"unknown preset {preset}")
+        word_filters = tuple(sorted(set(word_filters or ())))
+        if kind != "passphrase" and (total_length or word_lengths or
+                                     word_filters):
+            raise ValueError("word lengths only apply to passphrases")
+        if number is None and min_entropy is None and not total_length:
+            raise ValueError("number, min_entropy or total_length is needed")
+        if number is not None:
+            number = int(number)
+            if number <= 0:
+                raise ValueError("number must be positive")
+        elif not total_length:
+            number = 1
+        minimums = {k: v for k, v in (minimums or {}).items() if v}
+        extra = None if extra is None else tuple(extra)
+        target = min_entropy or 0
+        chars = classes = cset = model = None
+
+        if kind == "pronounceable":
+            if minimums:
+                raise ValueError("minimums only apply to passwords")
+            if extra is not None:
+                raise ValueError("pronounceable passwords are letters only")
+            words = None
+            model = pronounceable_model(wordlist or "nltk")
+            if target:
+                number = max(number, model.length_for(target))
+            # Computed when it's asked for, see the entropy property
+            entropy = None
+        elif kind == "passphrase":
+            if minimums:
+                raise ValueError("minimums only apply to passwords")
+            if total_length or word_lengths or word_filters:
+                # A view of the words of the lengths and classes asked for
+                words = length_index(wordlist or "nltk", word_filters)
+                words = words.select(*(word_lengths or ()))
+                if not len(words):
+                    raise ValueError("no words of those lengths")
+            elif words is None:
+                words = load_words(wordlist or "nltk")
+            if total_length:
+                if extra is not None:
+                    raise ValueError("extra characters don't fit an exact "
+                                     "length")
+                total_length = int(total_length)
+                entropy = words.entropy(total_length, number)
+                if entropy < target:
+                    raise ValueError(f"{total_length} characters give only "
+                                     f"{entropy:.1f} bits")
+            else:
+                # expanded_passphrase() takes a list, empty for
+                # punctuation
+                cset = None if extra is None else list(extra)
+                extra_size = None if extra is None else \
+                    len(set("".join(extra) or string.punctuation))
+                number = max(number, passphrase_length(target, len(words),
+                                                       extra_size))
+                entropy = passphrase_entropy(len(words), number, extra_size)
+        else:
+            chars = alphabet(preset, extra)
+            words = None
+            if minimums:
+                classes = split_classes(chars.chars, minimums,
+                                        "".join(extra or ()))
+                if min_entropy is None and \
+                        number < sum(minimums.values()):
+                    raise ValueError("the password is too short")
+                number = max(number, constrained_length(target, classes))
+                entropy = constrained_entropy(classes, number)
+            else:
+                number = max(number, password_length(target, len(chars)))
+                entropy = password_entropy(len(chars), number)
+
+        set_ = super().__setattr__
+        set_("kind", kind)
+        set_("number", number)
+        set_("preset", preset)
+        set_("extra", extra)
+        set_("wordlist", wordlist)
+        set_("total_length", total_length or None)
+        set_("word_lengths", None if word_lengths is None else
+             tuple(word_lengths))
+        set_("word_filters", word_filters)
+        set_("alphabet", chars)
+        set_("classes", classes)
+        set_("words", words)
+        set_("cset", cset)
+        set_("model", model)
+        set_("_entropy", entropy)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Generator is immutable")
+
+    @property
+    def entropy(self):
+        """
+        Bits of entropy of an item, a lower bound for expanded
+        passphrases, the min-entropy of pronounceable passwords
+
+        The min-entropy takes a while for long passwords, it's only
+        computed on first use and then kept by the model.
+        """
+        if self.model is not None:
+            return self.model.min_entropy(self.number)
+        return self._entropy
+
+    def __repr__(self):
+        return (f"Generator({self.kind!r}, {self.number}, "
+                f"preset={self.preset!r}, extra={self.extra!r})")
+
+    def generate(self, rng=None):
+        """
+        Generate one password or passphrase
+
+        :param rng: source of random numbers, the OS CSPRNG if None, see
+            rndplib.seeded
+        :type rng: random.Random or SeededRandom
+        :return: password or passphrase
+        :rtype: str
+        """
+        if self.model is not None:
+            return self.model.generate(self.number, rng)
+        if self.total_length:
+            return self.words.passphrase(self.total_length, self.number, rng)
+        if self.kind == "passphrase":
+            rd = passphrase(self.words, self.number, rng)
+            if self.cset is not None:
+                rd = expanded_passphrase(rd, self.number, self.cset, rng)
+            return rd
+        if self.classes:
+            return constrained_password(self.classes, self.number, rng)
+        return password(self.alphabet, self.number, rng)
+
+    def generate_many(self, count):
+        """
+        Generate passwords or passphrases lazily
+
+        :param count: number of items
+        :type count: int
+        :return: passwords or passphrases
+        :rtype: collections.abc.Iterator
+        """
+        if self.model is not None:
+            return (self.model.generate(self.number) for _ in range(count))
+        if self.total_length:
+            return (self.words.passphrase(self.total_length, self.number)
+                    for _ in range(count))
+        if self.kind == "passphrase":
+            return iter_passphrases(self.words, self.number, count,
+                                    self.cset)
+        if self.classes:
+            return (constrained_password(self.classes, self.number)
+                    for _ in range(count))
+        return iter_passwords(self.alphabet, self.number, count)
+
+    def generate_seeded(self, seed, start, count):
+        """
+        Generate items start to start + count of a deterministic dataset,
+        NOT secret, see rndplib.seeded
+
+        :param seed: seed of the dataset
+        :type seed: str or bytes
+        :param start: index of the first item
+        :type start: int
+        :param count: number of items
+        :type count: int
+        :return: passwords or passphrases
+        :rtype: collections.abc.Iterator
+        """
+        if self.model is not None:
+            return (self.model.generate(self.number, SeededRandom(seed, k))
+                    for k in range(start, start + count))
+        if self.total_length:
+            return (self.words.passphrase(self.total_length, self.number,
+                                          SeededRandom(seed, k))
+                    for k in range(start, start + count))
+        if self.kind == "passphrase":
+            return iter_seeded_passphrases(seed, self.words, self.number,
+                                           start, count, self.cset)
+        if self.classes:
+            return (constrained_password(self.classes, self.number,
+                                         SeededRandom(seed, k))
+                    for k in range(start, start + count))
+        return iter_seeded_passwords(seed, self.alphabet, self.number,
+                                     start, count)
+
+    def generate_unique(self, count, issued=None, stats=None):
+        """
+        Generate passwords that are unique within the run, see
+        rndplib.unique.iter_unique_passwords()
+
+        :param count: number of passwords
+        :type count: int
+        :param issued: passwords to leave out
+        :type issued: BloomFilter
+        :param stats: filled with statistics of the run if given
+        :type stats: dict
+        :raise ValueError: not a plain password generator, or there are
+            fewer possible passwords than count
+        :return: passwords
+        :rtype: collections.abc.Iterator
+        """
+        if self.kind != "password" or self.classes:
+            raise ValueError("only plain passwords can be made unique")
+        return iter_unique_passwords(self.alphabet, self.number, count,
+                                     issued, stats)
+
+    def request(self, count=1):
+        """
+        Return the request of rndplib.server for this configuration
+
+        :param count: number of items
+        :type count: int
+        :return: generation request
+        :rtype: dict
+        """
+        req = {"type": self.kind, "preset": self.preset,
+               "number": self.number, "count": count,
+               "extra": None if self.extra is None else list(self.extra)}
+        if self.wordlist:
+            # The server may run in another directory
+            req["wordlist"] = absolute_source(self.wordlist)
+        if self.total_length:
+            req["length"] = self.total_length
+        if self.word_lengths:
+            req["shortest"], req["longest"] = self.word_lengths
+        if self.word_filters:
+            req["filters"] = list(self.word_filters)
+        return req
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Project: RandomPass
+
+Copyright 2018, Korvin F. Ezüst
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Entropy of generated secrets
+
+Everything is computed from the size of the alphabet or word list, which
+Alphabet and WordIndex know without touching the characters or words, so
+nothing needs to be generated to check a policy.
+"""
+
+import math
+
+__author__ = "Korvin F. Ezüst"
+__copyright__ = "Copyright (c) 2018, Korvin F. Ezüst"
+__license__ = "Apache 2.0"
+__version__ = "1.0"
+__email__ = "dev@korvin.eu"
+__status__ = "Production"
+
+
+def bits(size):
+    """
+    Return the entropy of one uniform pick from size items
+
+    :param size: number of items
+    :type size: int
+    :return: bits
+    :rtype: float
+    """
+    return math.log2(size)
+
+
+def password_entropy(size, n):
+    """
+    Return the entropy of a password
+
+    :param size: number of distinct characters in the set
+    :type size: int
+    :param n: number of characters
+    :type n: int
+    :return: bits
+    :rtype: float
+    """
+    return n * bits(size)
+
+
+def expansion_entropy(extra_size):
+    """
+    Return the entropy expanded_passphrase() adds at the least
+
+    At least two extra characters are mixed in. Only those two are
+    counted, their positions and the random number of further characters
+    are left out, so the result is a lower bound.
+
+    :param extra_size: number of distinct extra characters
+    :type extra_size: int
+    :return: bits
+    :rtype: float
+    """
+    return 2 * bits(extra_size)
+
+
+def passphrase_entropy(size, n, extra_size=None):
+    """
+    Return the entropy of a passphrase
+
+    :param size: number of words in the list
+    :type size: int
+    :param n: number of words
+    :type n: int
+    :param extra_size: number of distinct extra characters mixed in, None
+        if the passphrase is not expanded
+    :type extra_size: int
+    :return: bits, a lower bound if extra_size is given
+    :rtype: float
+    """
+    h = n * bits(size)
+    if extra_size:
+        h += expansion_entropy(extra_size)
+    return h
+
+
+def _units(target, per_unit):
+    """Return the smallest n with n * per_unit >= target"""
+    if target <= 0:
+        return 0
+    if per_unit <= 0:
+        raise ValueError("a single character or word has no entropy")
+    n = math.ceil(target / per_unit)
+    # Guard against rounding up a product that is already exact
+    if n > 0 and (n - 1) * per_unit >= target:
+        n -= 1
+    return n
+
+
+def password_length(target, size):
+    """
+    Return the shortest password reaching an entropy target
+
+    :param target: bits
+    :type target: float
+    :param size: number of distinct characters in the set
+    :type size: int
+    :return: number of characters
+    :rtype: int
+    """
+    return max(1, _units(target, bits(size)))
+
+
+def passphrase_length(target, size, extra_size=None):
+    """
+    Return the fewest words reaching an entropy target
+
+    :param target: bits
+    :type target: float
+    :param size: number of words in the list
+    :type size: int
+    :param extra_size: number of distinct extra characters mixed in, None
+        if the passphrase is not expanded
+    :type extra_size: int
+    :return: number of words, at least 1
+    :rtype: int
+    """
+    if extra_size:
+        target -= expansion_entropy(extra_size)
+    return max(1, _units(target, bits(size)))
@@ -19,12 +19,14 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-import nltk
-from nltk.corpus import stopwords
-from nltk.corpus import words
 import os
+import time
+from rndplib import corpus, instrument
+from rndplib.alphabet import Alphabet, from_chars
+from rndplib.output import write_lines
+from rndplib.wordindex import (
+    build_index, cached, index_path, WordArray, WordIndex)
 import secrets
-import shutil
 import string
 
 __author__ = "Korvin F. Ezüst"
@@ -34,17 +36,59 @@ __version__ = "1.0"
 __email__ = "dev@korvin.eu"
 __status__ = "Production"
 
+# Number of random bytes read from the OS at once in iter_passwords()
+BLOCK_SIZE = 1 << 20
 
-def download_words():
-    """Replace word and stop-word list"""
-    # Get the download directory chosen by nltk
-    download_dir = nltk.downloader.Downloader().default_download_dir()
-    # Remove directory corpora from it, ignore errors
-    download_dir = os.path.join(download_dir, "corpora")
-    shutil.rmtree(download_dir, ignore_errors=True)
-    # Download word and stop-word list
-    nltk.download("words")
-    nltk.download("stopwords")
+
+class _SystemRandom(secrets.SystemRandom):
+    """
+    SystemRandom counting and timing its reads of the OS CSPRNG while
+    rndplib.instrument is enabled
+
+    Every draw of choice(), randrange(), sample() and shuffle() goes
+    through getrandbits().
+    """
+
+    def getrandbits(self, k):
+        if not instrument.enabled:
+            return secrets.SystemRandom.getrandbits(self, k)
+        instrument.count("random bytes", (k + 7) // 8)
+        with instrument.stage("csprng"):
+            return secrets.SystemRandom.getrandbits(self, k)
+
+    def random(self):
+        if not instrument.enabled:
+            return secrets.SystemRandom.random(self)
+        # 53 bits from 7 bytes
+        instrument.count("random bytes", 7)
+        with instrument.stage("csprng"):
+            return secrets.SystemRandom.random(self)
+
+
+# Default source of choice(), randrange() and sample() of every generator,
+# backed by the OS CSPRNG like the secrets module
+system_random = _SystemRandom()
+
+
+def download_words(progress=None, mirror=None):
+    """
+    Update word and stop-word list, rebuild the word index if they changed
+
+    :param progress: called with a short description of each step
+    :type progress: collections.abc.Callable
+    :param mirror: nltk data directory to copy the lists from instead of
+        downloading them
+    :type mirror: str
+    :return: True if the lists changed
+    :rtype: bool
+    """
+    changed = corpus.update(mirror, progress)
+    # Rebuild the index from the fresh word list
+    if changed or not os.path.exists(index_path()):
+        if progress:
+            progress("BUILDING WORD INDEX...")
+        build_index(word_list(), index_path())
+    return bool(changed)
 
 
 def word_list():
@@ -55,37 +99,62 @@ def word_list():
     :return: English words
     :rtype: list
     """
-    w = words.words()
-    sw = stopwords.words("english")
-    # Remove stop words
-    w = [i for i in w if i not in sw]
-    # Remove words shorter than 3 characters
-    w = [i for i in w if len(i) > 2]
-    # Remove words with apostrophe
-    w = [i for i in w if "'" not in i]
-    return w
+    # nltk is slow to import, only load it when words are needed
+    with instrument.stage("nltk import"):
+        from nltk.corpus import stopwords
+        from nltk.corpus import words
+    corpus.use_data_dir()
+    with instrument.stage("corpus load"):
+        try:
+            sw = set(stopwords.words("english"))
+            w = words.words()
+        except LookupError:
+            # An update may be moving the corpus into place, look again
+            time.sleep(corpus.RETRY_DELAY)
+            sw = set(stopwords.words("english"))
+            w = words.words()
+    # Remove stop words, words shorter than 3 characters and words with
+    # apostrophe
+    with instrument.stage("word filter"):
+        return [i for i in w if len(i) > 2 and "'" not in i and i not in sw]
 
 
-def passphrase(w, n):
+def word_index():
+    """
+    Return the filtered English words from the precompiled index, build the
+    index from word_list() on first use
+
+    :return: English words
+    :rtype: WordIndex or WordArray
+    """
+    # A missing or unreadable index is rebuilt, word_list() raises
+    # LookupError if the word list itself is not downloaded yet
+    return cached("word index", index_path(), WordIndex, word_list,
+                  build_index, WordArray)
+
+
+def passphrase(w, n, rng=None):
     """
     Generate passphrase
 
-    :param w: word list
-    :type w: list
+    :param w: word list, anything with len() and indexing
+    :type w: list, WordIndex, WordArray or LengthIndex
     :param n: number of words
     :type n: int
+    :param rng: source of choice(), the OS CSPRNG if None, see
+        rndplib.seeded
+    :type rng: random.Random or SeededRandom
     :return: passphrase
     :rtype: str
     """
-    # Store the random string
-    rd = ""
-    # Get n random words
-    for _ in range(n):
-        rd += secrets.choice(w) + " "
-    return rd
+    choice = (rng or system_random).choice
+    if instrument.enabled:
+        instrument.count("words drawn", n)
+    # Get n random words, separated by spaces
+    return " ".join([choice(w) for _ in range(n)])
 
 
-def expanded_passphrase(rd, n, cset):
+def expanded_passphrase(rd, n, cset, rng=None):
     """
     Mix extra characters into passphrase
 
@@ -94,40 +163,36 @@ def expanded_passphrase(rd, n, cset):
     :param n: number of words
     :type n: int
     :param cset: extra character set
-    :type cset: lsit
+    :type cset: list
+    :param rng: source of randrange(), choice() and sample(), the OS
+        CSPRNG if None, see rndplib.seeded
+    :type rng: random.Random or SeededRandom
     :return: passphrase with extra characters
     :rtype: str
     """
-    # Store extra characters if any
-    ext = ""
-    # Store indices of rd
-    indices = []
-    # Get a random number from 0 to n, exclusive
-    u = secrets.randbelow(n)
-    # Make it at least 2
-    if u < 2:
-        u = 2
-    # Loop in range of u
-    for _ in range(u):
-        # Get random character from cset or string.punctuation
-        try:
-            ext += secrets.choice("".join(cset))
-        except IndexError:
-            ext += secrets.choice(string.punctuation)
-        # Pick a random index in rd, don't pick the same twice
-        r = 0
-        while r in indices:
-            r = secrets.randbelow(len(rd))
-        indices.append(r)
-    # Expand rd with extra characters at given indices
-    tmp = ""
-    j = 0
-    for i in range(len(rd)):
-        tmp += rd[i]
-        if i in indices:
-            tmp += ext[j]
-            j += 1
-    return tmp
+    rng = rng or system_random
+    # Get a random number from 0 to n, exclusive, make it at least 2 but
+    # no more than the number of characters in rd
+    u = min(max(rng.randrange(n), 2), len(rd))
+    # Get random characters from cset or string.punctuation
+    chars = "".join(cset) or string.punctuation
+    ext = [rng.choice(chars) for _ in range(u)]
+    # Pick u distinct indices of rd in one go and mark them, scanning the
+    # marks in order keeps the whole thing linear
+    marks = bytearray(len(rd))
+    for i in rng.sample(range(len(rd)), u):
+        marks[i] = 1
+    # Expand rd with extra characters after the characters at the indices
+    parts = []
+    start = 0
+    i = marks.find(1)
+    for c in ext:
+        parts.append(rd[start:i + 1])
+        parts.append(c)
+        start = i + 1
+        i = marks.find(1, start)
+    parts.append(rd[start:])
+    return "".join(parts)
 
 
 def expanded_chars(ch, cset):
@@ -151,22 +216,136 @@ def expanded_chars(ch, cset):
     return ch
 
 
-def password(ch, n):
+def password(ch, n, rng=None):
     """
     Generate password
 
     :param ch: character set
-    :type ch: str
+    :type ch: str or Alphabet
     :param n: number of characters
     :type n: int
+    :param rng: source of randbytes(), random bytes of the OS if None,
+        see rndplib.seeded
+    :type rng: random.Random or SeededRandom
     :return: password
     :rtype: str
     """
-    # Remove duplicate characters
-    ch = "".join(set(ch))
-    # Store password
-    rd = ""
-    # Pick random characters from ch
-    for _ in range(n):
-        rd += secrets.choice(ch)
-    return rd
+    # Pick random characters from ch, duplicates don't count twice
+    return _random_chars(_as_alphabet(ch), n,
+                         os.urandom if rng is None else rng.randbytes)
+
+
+def _as_alphabet(ch):
+    """Return ch as an Alphabet, built once per character string"""
+    return ch if isinstance(ch, Alphabet) else from_chars(ch)
+
+
+def _random_chars(alpha, m, randbytes=os.urandom):
+    """
+    Return m characters picked uniformly from an alphabet, reading random
+    bytes from the OS in large blocks
+
+    :param alpha: alphabet
+    :type alpha: Alphabet
+    :param m: number of characters
+    :type m: int
+    :param randbytes: function(size) returning random bytes
+    :type randbytes: collections.abc.Callable
+    :return: random characters
+    :rtype: str
+    """
+    chunks = []
+    left = m
+    while left > 0:
+        # Expected number of bytes for the rest plus a little slack
+        size = min(BLOCK_SIZE, left * alpha.width * 256 ** alpha.width //
+                   alpha.limit + 64)
+        if instrument.enabled:
+            instrument.count("random bytes", size)
+        with instrument.stage("csprng"):
+            block = randbytes(size)
+        if alpha.width == 1:
+            # Drop rejected bytes and map the rest in C
+            block = block.translate(None, alpha.reject)[:left]
+            chunk = block.decode("latin-1").translate(alpha.table)
+        else:
+            # Two bytes per character for sets over 256 characters
+            values = memoryview(block[:size - size % 2]).cast("H")
+            table = alpha.table
+            limit = alpha.limit
+            chunk = "".join(
+                [table[v] for v in values if v < limit][:left])
+        chunks.append(chunk)
+        left -= len(chunk)
+    return "".join(chunks)
+
+
+def iter_passwords(ch, n, count):
+    """
+    Generate passwords lazily
+
+    Random bytes are read in blocks of BLOCK_SIZE and mapped to the
+    character set for a whole block of passwords at once, instead of one
+    call per character. Memory use doesn't depend on count.
+
+    :param ch: character set
+    :type ch: str or Alphabet
+    :param n: number of characters
+    :type n: int
+    :param count: number of passwords
+    :type count: int
+    :return: passwords
+    :rtype: collections.abc.Iterator
+    """
+    alpha = _as_alphabet(ch)
+    # Passwords generated per block
+    per_block = max(1, BLOCK_SIZE // max(n, 1))
+    for first in range(0, count, per_block):
+        m = min(per_block, count - first)
+        rd = _random_chars(alpha, n * m)
+        for i in range(m):
+            yield rd[i * n:(i + 1) * n]
+
+
+def iter_passphrases(w, n, count, cset=None):
+    """
+    Generate passphrases lazily from the same word list
+
+    :param w: word list, anything with len() and indexing
+    :type w: list, WordIndex, WordArray or LengthIndex
+    :param n: number of words
+    :type n: int
+    :param count: number of passphrases
+    :type count: int
+    :param cset: mix in extra characters from this set, see
+        expanded_passphrase(), or None for plain passphrases
+    :type cset: list
+    :return: passphrases
+    :rtype: collections.abc.Iterator
+    """
+    for _ in range(count):
+        rd = passphrase(w, n)
+        if cset is not None:
+            rd = expanded_passphrase(rd, n, cset)
+        yield rd
+
+
+def password_batch(ch, n, count, stream=None):
+    """
+    Generate many passwords at once, see iter_passwords()
+
+    :param ch: character set
+    :type ch: str or Alphabet
+    :param n: number of characters
+    :type n: int
+    :param count: number of passwords
+    :type count: int
+    :param stream: write passwords to this text stream, one per line,
+        instead of returning them
+    :type stream: io.TextIOBase
+    :return: passwords, or None if stream is given
+    :rtype: list
+    """
+    if stream is None:
+        return list(iter_passwords(ch, n, count))
+    write_lines(iter_passwords(ch, n, count), stream)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Project: RandomPass
+
+Copyright 2018, Korvin F. Ezüst
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Salted hashes of generated secrets
+
+Hashes are written in the modular crypt formats used by passlib:
+
+  $scrypt$ln=14,r=8,p=1$<salt>$<hash>
+  $pbkdf2-sha256$<rounds>$<salt>$<hash>
+
+Only hash functions of the standard library are available, bcrypt is not.
+"""
+
+import base64
+from functools import partial
+from itertools import islice
+import hashlib
+import multiprocessing
+import os
+
+__author__ = "Korvin F. Ezüst"
+__copyright__ = "Copyright (c) 2018, Korvin F. Ezüst"
+__license__ = "Apache 2.0"
+__version__ = "1.0"
+__email__ = "dev@korvin.eu"
+__status__ = "Production"
+
+# Bytes of salt per hash
+SALT_SIZE = 16
+# Cost used when none is given: log2 of the scrypt CPU/memory cost, and
+# PBKDF2 rounds
+DEFAULT_COST = {"scrypt": 14, "pbkdf2": 600000}
+# Largest cost accepted: scrypt needs 2 ** (cost + 11) bytes of memory at
+# most, which must fit a C int, and so must the PBKDF2 rounds
+MAX_COST = {"scrypt": 19, "pbkdf2": 2 ** 31 - 1}
+# Secrets handed to the process pool at a time
+WINDOW = 4096
+
+
+def _b64(data):
+    """Standard base64 without padding"""
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _ab64(data):
+    """passlib's adapted base64, "." instead of "+" and no padding"""
+    return _b64(data).replace("+", ".")
+
+
+def hash_scrypt(secret, cost=DEFAULT_COST["scrypt"], salt=None):
+    """
+    Hash a secret with scrypt
+
+    :param secret: secret
+    :type secret: str
+    :param cost: log2 of the CPU/memory cost, r is 8 and p is 1
+    :type cost: int
+    :param salt: salt, random if None
+    :type salt: bytes
+    :return: hash in modular crypt format
+    :rtype: str
+    """
+    salt = salt or os.urandom(SALT_SIZE)
+    n, r, p = 1 << cost, 8, 1
+    digest = hashlib.scrypt(secret.encode("utf-8"), salt=salt, n=n, r=r,
+                            p=p, maxmem=256 * n * r * p, dklen=32)
+    return f"$scrypt$ln={cost},r={r},p={p}${_b64(salt)}${_b64(digest)}"
+
+
+def hash_pbkdf2(secret, cost=DEFAULT_COST["pbkdf2"], salt=None):
+    """
+    Hash a secret with PBKDF2-HMAC-SHA256
+
+    :param secret: secret
+    :type secret: str
+    :param cost: number of rounds
+    :type cost: int
+    :param salt: salt, random if None
+    :type salt: bytes
+    :return: hash in modular crypt format
+    :rtype: str
+    """
+    salt = salt or os.urandom(SALT_SIZE)
+    digest = hashlib.pbkdf2_hmac("sha256", secret.encode("utf-8"), salt,
+                                 cost)
+    return f"$pbkdf2-sha256${cost}${_ab64(salt)}${_ab64(digest)}"
+
+
+# Hash method name -> function(secret, cost)
+HASHERS = {"scrypt": hash_scrypt, "pbkdf2": hash_pbkdf2}
+
+
+def check_cost(method, cost):
+    """
+    Make sure a cost parameter can be used with a method
+
+    :param method: key of HASHERS
+    :type method: str
+    :param cost: cost parameter of the method
+    :type cost: int
+    :raise ValueError: the cost is out of range
+    """
+    if not 1 <= cost <= MAX_COST[method]:
+        raise ValueError(f"the {method} cost must be from 1 to "
+                         f"{MAX_COST[method]}")
+
+
+def hash_secret(secret, method="scrypt", cost=None):
+    """
+    Hash a secret with a random salt
+
+    :param secret: secret
+    :type secret: str
+    :param method: key of HASHERS
+    :type method: str
+    :param cost: cost parameter of the method, DEFAULT_COST if None
+    :type cost: int
+    :raise ValueError: the cost is out of range
+    :return: hash in modular crypt format
+    :rtype: str
+    """
+    if cost is None:
+        cost = DEFAULT_COST[method]
+    check_cost(method, cost)
+    return HASHERS[method](secret, cost)
+
+
+def iter_hashed(items, method="scrypt", cost=None, workers=None):
+    """
+    Hash secrets in a pool of processes
+
+    Secrets are handed out WINDOW at a time, so memory use doesn't depend
+    on the number of items. The order is kept.
+
+    :param items: secrets
+    :type items: collections.abc.Iterable
+    :param method: key of HASHERS
+    :type method: str
+    :param cost: cost parameter of the method, DEFAULT_COST if None
+    :type cost: int
+    :param workers: number of processes, number of CPUs if None
+    :type workers: int
+    :return: (secret, hash) pairs
+    :rtype: collections.abc.Iterator
+    """
+    func = partial(hash_secret, method=method, cost=cost)
+    items = iter(items)
+    with multiprocessing.Pool(workers) as pool:
+        while True:
+            window = list(islice(items, WINDOW))
+            if not window:
+                break
+            yield from zip(window, pool.map(func, window))
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Project: RandomPass
+
+Copyright 2018, Korvin F. Ezüst
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Timers and counters of the current process
+
+Instrumented code wraps a stage in "with stage(name):" and checks
+"if instrument.enabled:" before counting. Until enable() is called stage()
+returns a shared object that does nothing and counting is skipped, so the
+instrumentation costs an attribute lookup where it sits. Only the current
+process is measured, not the workers of rndplib.parallel or
+rndplib.hashing.
+"""
+
+import json
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+__author__ = "Korvin F. Ezüst"
+__copyright__ = "Copyright (c) 2018, Korvin F. Ezüst"
+__license__ = "Apache 2.0"
+__version__ = "1.0"
+__email__ = "dev@korvin.eu"
+__status__ = "Production"
+
+enabled = False
+
+# Stage name -> [calls, seconds]
+_timers = {}
+# Counter name -> value
+_counters = {}
+_profiler = None
+_started = None
+
+
+class _Stage:
+    """Add the time spent in a with block to a stage"""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        t = _timers.setdefault(self.name, [0, 0.0])
+        t[0] += 1
+        t[1] += time.perf_counter() - self.start
+
+
+class _Off:
+    """Stand-in for _Stage while disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_OFF = _Off()
+
+
+def stage(name):
+    """
+    Return a context manager timing a stage
+
+    :param name: name of the stage
+    :type name: str
+    :return: context manager
+    :rtype: _Stage
+    """
+    return _Stage(name) if enabled else _OFF
+
+
+def count(name, n=1):
+    """
+    Add to a counter, callers check enabled first
+
+    :param name: name of the counter
+    :type name: str
+    :param n: amount to add
+    :type n: int
+    """
+    _counters[name] = _counters.get(name, 0) + n
+
+
+def enable(profile=False):
+    """
+    Start measuring
+
+    :param profile: run cProfile as well, see dump_profile()
+    :type profile: bool
+    """
+    global enabled, _profiler, _started
+    enabled = True
+    _started = time.perf_counter()
+    if profile:
+        # Only imported when asked for, it's not needed otherwise
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+
+def dump_profile(path):
+    """
+    Stop cProfile and write its statistics for pstats or snakeviz
+
+    :param path: path of the output file
+    :type path: str
+    """
+    global _profiler
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler.dump_stats(path)
+        _profiler = None
+
+
+def peak_memory():
+    """
+    Return the peak resident memory of the process
+
+    :return: bytes, or None if not known on this platform
+    :rtype: int
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes, except on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def report():
+    """
+    Return what has been measured since enable()
+
+    :return: "seconds" in total, "stages" (name -> calls and seconds),
+        "counters" and "peak_memory" (bytes)
+    :rtype: dict
+    """
+    total = time.perf_counter() - _started if _started is not None else 0
+    return {"seconds": total,
+            "stages": {name: {"calls": calls, "seconds": seconds}
+                       for name, (calls, seconds) in _timers.items()},
+            "counters": dict(_counters),
+            "peak_memory": peak_memory()}
+
+
+def format_report(rep, fmt="summary"):
+    """
+    Describe a report
+
+    :param rep: report, see report()
+    :type rep: dict
+    :param fmt: "summary" or "json"
+    :type fmt: str
+    :return: text
+    :rtype: str
+    """
+    if fmt == "json":
+        return json.dumps(rep, indent=2)
+    lines = [f"total: {rep['seconds']:.3f} s"]
+    for name, t in rep["stages"].items():
+        lines.append(f"{name}: {t['seconds']:.3f} s in {t['calls']} calls")
+    for name, value in rep["counters"].items():
+        lines.append(f"{name}: {value}")
+    if rep["peak_memory"] is not None:
+        lines.append(f"peak memory: {rep['peak_memory'] / 2 ** 20:.1f} MiB")
+    return "\n".join(lines)
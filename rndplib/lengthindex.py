@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Project: RandomPass
+
+Copyright 2018, Korvin F. Ezüst
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Words of a word list grouped by length
+
+The positions of the words that pass the filters are sorted by word length
+into one array, with the start of each length in another, so the words of
+any range of lengths are a slice of it. A LengthIndex is a view of such a
+slice with len() and indexing, so passphrase() draws from it as from any
+word list, in constant time. The index is cached next to the word indexes
+by the SHA-256 of the source and the filters.
+
+It also generates passphrases of an exact number of characters, spaces
+included. Every passphrase of that length is equally likely: the number
+of passphrases with k words and t characters is counted for every k and t
+up to the target, and each word length is picked in proportion to the
+number of passphrases it leaves room for. The entropy is the log2 of the
+number of passphrases of the target length.
+"""
+
+from array import array
+from functools import lru_cache
+import math
+import os
+import struct
+from rndplib import instrument
+from rndplib.generator import system_random
+from rndplib.wordindex import cache_dir, cached, little_endian, write_atomic
+from rndplib.wordsource import load_words, source_hash
+
+__author__ = "Korvin F. Ezüst"
+__copyright__ = "Copyright (c) 2018, Korvin F. Ezüst"
+__license__ = "Apache 2.0"
+__version__ = "1.0"
+__email__ = "dev@korvin.eu"
+__status__ = "Production"
+
+# Characters easily mistaken for each other
+AMBIGUOUS = "0O1Il|"
+
+# Index file layout, all integers little-endian:
+#   header  magic, format version, number of words, longest word length
+#   starts  longest + 2 unsigned 32-bit positions, where each length starts
+#   order   positions of the words in the word list, sorted by length
+MAGIC = b"RPLX"
+VERSION = 1
+_HEADER = struct.Struct("<4sIII")
+
+
+def _lower(w):
+    """Only lower case letters"""
+    return w.isalpha() and w.islower()
+
+
+def _unambiguous(w):
+    """No characters that are easily mistaken for each other"""
+    return not any(c in AMBIGUOUS for c in w)
+
+
+# Filter name -> function(word) returning whether to keep it
+FILTERS = {"lower": _lower, "unambiguous": _unambiguous}
+
+
+def index_path(key, filters=()):
+    """
+    Return the path of a length index in the cache directory
+
+    :param key: SHA-256 of the word list source
+    :type key: str
+    :param filters: keys of FILTERS
+    :type filters: tuple
+    :return: path of the index file
+    :rtype: str
+    """
+    name = "-".join(sorted(filters)) or "all"
+    return os.path.join(cache_dir(), f"lengths-{key}-{name}.lix")
+
+
+def build_lengths(words, filters=()):
+    """
+    Sort the positions of the words passing the filters by word length
+
+    :param words: word list
+    :type words: list, WordIndex or WordArray
+    :param filters: keys of FILTERS
+    :type filters: tuple
+    :raise ValueError: unknown filter
+    :return: positions sorted by length, and where each length starts
+    :rtype: tuple
+    """
+    try:
+        checks = [FILTERS[f] for f in filters]
+    except KeyError as e:
+        raise ValueError(f"unknown word filter {e.args[0]}")
+    buckets = {}
+    for i, w in enumerate(words):
+        if all(check(w) for check in checks):
+            buckets.setdefault(len(w), array("I")).append(i)
+
+    order = array("I")
+    starts = array("I", [0])
+    for length in range(max(buckets, default=0) + 1):
+        order.extend(buckets.get(length, ()))
+        starts.append(len(order))
+    return order, starts
+
+
+def save_lengths(order, starts, path):
+    """
+    Write a length index to a file, renamed into place when complete
+
+    :param order: positions sorted by length
+    :type order: array
+    :param starts: where each length starts
+    :type starts: array
+    :param path: path of the index file
+    :type path: str
+    """
+    order, starts = array("I", order), array("I", starts)
+    write_atomic(path, (
+        _HEADER.pack(MAGIC, VERSION, len(order), len(starts) - 2),
+        little_endian(starts).tobytes(), little_endian(order).tobytes()))
+
+
+def load_lengths(path):
+    """
+    Read a length index written by save_lengths()
+
+    :param path: path of the index file
+    :type path: str
+    :raise OSError: the file could not be read
+    :raise ValueError: not a length index
+    :return: positions sorted by length, and where each length starts
+    :rtype: tuple
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        magic, version, count, longest = _HEADER.unpack_from(data, 0)
+    except struct.error:
+        magic, version, count, longest = b"", 0, 0, 0
+    size = _HEADER.size + 4 * (longest + 2 + count)
+    if magic != MAGIC or version != VERSION or len(data) != size:
+        raise ValueError(f"{path} is not a RandomPass length index")
+    starts = array("I")
+    starts.frombytes(data[_HEADER.size:_HEADER.size + 4 * (longest + 2)])
+    order = array("I")
+    order.frombytes(data[_HEADER.size + 4 * (longest + 2):])
+    return little_endian(order), little_endian(starts)
+
+
+@lru_cache(maxsize=64)
+def _ways(counts, total, n):
+    """
+    Count the passphrases of every length up to total
+
+    rows[k][t] is the number of passphrases of k words and t characters,
+    rows[0][t] the number with any number of words.
+    """
+    rows = [[0] * (total + 1)]
+    for length, c in counts:
+        if length <= total:
+            rows[0][length] = c
+    if n is None:
+        # Any number of words: a last word, or a word, a space and more
+        free = rows[0]
+        for t in range(total + 1):
+            free[t] += sum(c * free[t - length - 1] for length, c in counts
+                           if t - length - 1 > 0)
+        return rows
+    rows.append(rows[0])
+    for k in range(2, n + 1):
+        prev = rows[k - 1]
+        rows.append([sum(c * prev[t - length - 1] for length, c in counts
+                         if t - length - 1 > 0)
+                     for t in range(total + 1)])
+    return rows
+
+
+class LengthIndex:
+    """
+    Read-only view of the words of a list within a range of lengths
+
+    :param words: word list
+    :type words: list, WordIndex or WordArray
+    :param order: positions of words in words, sorted by length
+    :type order: array
+    :param starts: where each length starts in order, one past the longest
+        at the end
+    :type starts: array
+    :param shortest: shortest word length in the view
+    :type shortest: int
+    :param longest: longest word length in the view, no limit if None
+    :type longest: int
+    """
+
+    def __init__(self, words, order, starts, shortest=1, longest=None):
+        top = len(starts) - 2
+        self.shortest = max(shortest, 1)
+        self.longest = top if longest is None else min(longest, top)
+        self._words = words
+        self._order = order
+        self._starts = starts
+        self._lo = starts[min(self.shortest, top + 1)]
+        self._hi = max(self._lo, starts[max(self.longest + 1, 0)])
+        # (length, number of words) of the lengths in the view
+        self._counts = tuple(
+            (length, starts[length + 1] - starts[length])
+            for length in range(self.shortest, self.longest + 1)
+            if starts[length + 1] > starts[length])
+
+    def __len__(self):
+        return self._hi - self._lo
+
+    def __getitem__(self, i):
+        count = self._hi - self._lo
+        if i < 0:
+            i += count
+        if not 0 <= i < count:
+            raise IndexError("word index out of range")
+        return self._words[self._order[self._lo + i]]
+
+    def counts(self):
+        """
+        Return the number of words of each length
+
+        :return: length -> number of words, lengths without words left out
+        :rtype: dict
+        """
+        return dict(self._counts)
+
+    def select(self, shortest=1, longest=None):
+        """
+        Return the words of a range of lengths
+
+        :param shortest: shortest word length
+        :type shortest: int
+        :param longest: longest word length, no limit if None
+        :type longest: int
+        :return: view of the words
+        :rtype: LengthIndex
+        """
+        if longest is None or longest > self.longest:
+            longest = self.longest
+        return LengthIndex(self._words, self._order, self._starts,
+                           max(shortest, self.shortest), longest)
+
+    def count(self, total, n=None):
+        """
+        Return the number of passphrases of exactly total characters
+
+        :param total: number of characters, spaces included
+        :type total: int
+        :param n: number of words, any if None
+        :type n: int
+        :return: number of passphrases
+        :rtype: int
+        """
+        if total <= 0 or (n is not None and n <= 0):
+            return 0
+        return _ways(self._counts, total, n)[n or 0][total]
+
+    def entropy(self, total, n=None):
+        """
+        Return the entropy of a passphrase of exactly total characters
+
+        :param total: number of characters, spaces included
+        :type total: int
+        :param n: number of words, any if None
+        :type n: int
+        :raise ValueError: no passphrase has that length
+        :return: bits
+        :rtype: float
+        """
+        count = self.count(total, n)
+        if not count:
+            raise ValueError(f"no passphrase is {total} characters long")
+        return math.log2(count)
+
+    def passphrase(self, total, n=None, rng=None):
+        """
+        Generate a passphrase of exactly total characters, every one of
+        them equally likely
+
+        :param total: number of characters, spaces included
+        :type total: int
+        :param n: number of words, any if None
+        :type n: int
+        :param rng: source of randrange(), the OS CSPRNG if None, see
+            rndplib.seeded
+        :type rng: random.Random or SeededRandom
+        :raise ValueError: no passphrase has that length
+        :return: passphrase
+        :rtype: str
+        """
+        if not self.count(total, n):
+            raise ValueError(f"no passphrase is {total} characters long")
+        randrange = (rng or system_random).randrange
+        rows = _ways(self._counts, total, n)
+        out = []
+        t, k = total, n
+        while t > 0:
+            # Pick the length of the next word by the number of
+            # passphrases starting with a word of that length
+            r = randrange(rows[k or 0][t])
+            for length, c in self._counts:
+                if length == t and k in (None, 1):
+                    ways = c
+                elif t - length - 1 > 0 and k != 1:
+                    ways = c * rows[k - 1 if k else 0][t - length - 1]
+                else:
+                    continue
+                if r < ways:
+                    break
+                r -= ways
+            # Then a word of that length
+            start = self._starts[length]
+            out.append(self._words[self._order[start + randrange(c)]])
+            t -= length + 1
+            k = k - 1 if k else k
+        if instrument.enabled:
+            instrument.count("words drawn", len(out))
+        return " ".join(out)
+
+
+@lru_cache(maxsize=16)
+def length_index(source="nltk", filters=()):
+    """
+    Return the words of a source grouped by length, the index is built on
+    first use
+
+    :param source: "nltk" or a word list file, see rndplib.wordsource
+    :type source: str
+    :param filters: keys of FILTERS
+    :type filters: tuple
+    :raise LookupError: the nltk word list is not downloaded
+    :raise OSError: the word list file could not be read
+    :raise ValueError: unknown filter
+    :return: view of all the words passing the filters
+    :rtype: LengthIndex
+    """
+    source = source or "nltk"
+    filters = tuple(sorted(set(filters)))
+    words = load_words(source)
+    try:
+        path = index_path(source_hash(source), filters)
+    except OSError:
+        # The words are only kept in memory, so is the index
+        path = None
+    order, starts = cached("length index", path, load_lengths,
+                           lambda: build_lengths(words, filters),
+                           lambda lengths, p: save_lengths(*lengths, p))
+    return LengthIndex(words, order, starts)
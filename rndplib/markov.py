@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Project: RandomPass
+
+Copyright 2018, Korvin F. Ezüst
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Pronounceable passwords from a Markov chain of letters
+
+The chain is trained on the words of a word list source. Each letter is
+picked after the ORDER letters before it, as often as it follows them in
+the words, so the passwords read like made up English words. A password
+starts like a word does. If the letters before have never been followed
+by another one in the words, the next letter is picked like the first
+letter of a word. Every count is one higher than in the words, so any
+letter can follow any context. Without that a rare context followed by a
+single letter in the words makes the letter certain, and a loop of such
+contexts would give long passwords a very likely candidate.
+
+The model is compiled into a table of cumulative counts, one row of 26 per
+context, and cached next to the word indexes by the SHA-256 of the source.
+A letter is one random number below the total of its row and a binary
+search in the row.
+
+Letters are not equally likely, so the entropy of a password is not its
+length times log2(26). Both the Shannon entropy and the min-entropy of
+the passwords of a length are computed exactly from the table. Policies
+use the min-entropy, the number of bits of the most likely password,
+since an attacker knowing the model guesses the likely ones first. The
+most likely ways through the chain soon repeat with a fixed period, from
+then on the min-entropy of any length follows without more work.
+"""
+
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+import math
+import os
+import string
+import struct
+import threading
+from rndplib.generator import system_random
+from rndplib.wordindex import cache_dir, cached, little_endian, write_atomic
+from rndplib.wordsource import load_words, source_hash
+
+__author__ = "Korvin F. Ezüst"
+__copyright__ = "Copyright (c) 2018, Korvin F. Ezüst"
+__license__ = "Apache 2.0"
+__version__ = "1.0"
+__email__ = "dev@korvin.eu"
+__status__ = "Production"
+
+# Number of letters a letter depends on
+ORDER = 2
+LETTERS = string.ascii_lowercase
+# Letter -> position in a row
+_CODES = {c: i for i, c in enumerate(LETTERS)}
+# A context is a number in base 27, 0 stands for the start of a word and
+# letter i for i + 1, the oldest letter is the most significant digit
+_BASE = len(LETTERS) + 1
+
+# Letters the min-entropy is followed for before giving up on finding its
+# period
+MAX_SHAPES = 4096
+
+# Model file layout, all integers little-endian:
+#   header  magic, format version, order, letters per row
+#   table   27 ** order rows of 26 unsigned 32-bit cumulative counts
+MAGIC = b"RPMK"
+VERSION = 1
+_HEADER = struct.Struct("<4sIII")
+
+
+def model_path(key, order=ORDER):
+    """
+    Return the path of a model in the cache directory
+
+    :param key: SHA-256 of the word list source
+    :type key: str
+    :param order: number of letters a letter depends on
+    :type order: int
+    :return: path of the model file
+    :rtype: str
+    """
+    return os.path.join(cache_dir(), f"markov{order}-{key}.mkv")
+
+
+class MarkovModel:
+    """
+    Letter chain of fixed order as a table of cumulative counts
+
+    :param table: 27 ** order rows of 26 cumulative counts, every row
+        ending above 0
+    :type table: array
+    :param order: number of letters a letter depends on
+    :type order: int
+    """
+
+    def __init__(self, table, order=ORDER):
+        if order <= 0 or len(table) != _BASE ** order * len(LETTERS):
+            raise ValueError("the table doesn't match the order")
+        # Every letter must be possible in every row
+        width = len(LETTERS)
+        for base in range(0, len(table), width):
+            prev = 0
+            for c in table[base:base + width]:
+                if c <= prev:
+                    raise ValueError("a letter is missing from the table")
+                prev = c
+        self.order = order
+        self._table = table
+        # Context -> [(next context, probability, log2 of it)], built on
+        # first use by the entropy functions
+        self._rows = {}
+        # Min-entropy of 1, 2, ... letters so far, and the log2 of the
+        # most likely way of reaching each context after that many
+        self._min = []
+        self._best = {0: 0.0}
+        # Shape of _best -> number of letters it was seen at, and the
+        # period and rise once a shape repeats, see min_entropy()
+        self._shapes = {}
+        self._cycle = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def train(cls, words, order=ORDER):
+        """
+        Count the letters following each context in a word list
+
+        Words are lowercased, the ones with other characters than ASCII
+        letters are skipped.
+
+        :param words: words
+        :type words: collections.abc.Iterable
+        :param order: number of letters a letter depends on
+        :type order: int
+        :raise ValueError: there are no words of ASCII letters
+        :return: model
+        :rtype: MarkovModel
+        """
+        width = len(LETTERS)
+        span = _BASE ** (order - 1)
+        table = array("I", bytes(4 * _BASE ** order * width))
+        for word in words:
+            codes = [_CODES.get(c) for c in word.lower()]
+            if not codes or None in codes:
+                continue
+            ctx = 0
+            for j in codes:
+                table[ctx * width + j] += 1
+                ctx = ctx % span * _BASE + j + 1
+
+        if not any(table[:width]):
+            raise ValueError("no words of ASCII letters")
+        start = table[:width]
+        # Turn the counts into running totals, row 0 is the start of a word
+        for base in range(0, len(table), width):
+            # A dead end continues like a new word
+            row = table[base:base + width] if any(
+                table[base:base + width]) else start
+            total = 0
+            for i, c in enumerate(row):
+                # One more of every letter, so no letter is ever certain
+                total += c + 1
+                table[base + i] = total
+        return cls(table, order)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a model written by save()
+
+        :param path: path of the model file
+        :type path: str
+        :raise OSError: the file could not be read
+        :raise ValueError: not a model file
+        :return: model
+        :rtype: MarkovModel
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        try:
+            magic, version, order, width = _HEADER.unpack_from(data, 0)
+        except struct.error:
+            magic, version, order, width = b"", 0, 0, 0
+        if magic != MAGIC or version != VERSION or width != len(LETTERS):
+            raise ValueError(f"{path} is not a RandomPass letter model")
+        table = array("I")
+        table.frombytes(data[_HEADER.size:])
+        return cls(little_endian(table), order)
+
+    def save(self, path):
+        """
+        Write the model to a file, renamed into place when complete
+
+        :param path: path of the model file
+        :type path: str
+        """
+        write_atomic(path, (
+            _HEADER.pack(MAGIC, VERSION, self.order, len(LETTERS)),
+            little_endian(self._table).tobytes()))
+
+    def generate(self, n, rng=None):
+        """
+        Generate a pronounceable password
+
+        :param n: number of letters
+        :type n: int
+        :param rng: source of randrange(), the OS CSPRNG if None, see
+            rndplib.seeded
+        :type rng: random.Random or SeededRandom
+        :return: password
+        :rtype: str
+        """
+        randrange = (rng or system_random).randrange
+        table = self._table
+        width = len(LETTERS)
+        span = _BASE ** (self.order - 1)
+        out = []
+        ctx = 0
+        for _ in range(n):
+            base = ctx * width
+            # The last entry of a row is its total
+            r = randrange(table[base + width - 1])
+            j = bisect_right(table, r, base, base + width) - base
+            out.append(LETTERS[j])
+            ctx = ctx % span * _BASE + j + 1
+        return "".join(out)
+
+    def _row(self, ctx):
+        """Return the transitions of a context with their probabilities"""
+        row = self._rows.get(ctx)
+        if row is None:
+            width = len(LETTERS)
+            span = _BASE ** (self.order - 1)
+            cum = self._table[ctx * width:(ctx + 1) * width]
+            total = cum[-1]
+            row = []
+            prev = 0
+            for j, c in enumerate(cum):
+                if c > prev:
+                    p = (c - prev) / total
+                    row.append((ctx % span * _BASE + j + 1, p, math.log2(p)))
+                prev = c
+            self._rows[ctx] = row
+        return row
+
+    def entropy(self, n):
+        """
+        Return the Shannon entropy of the passwords of a length
+
+        :param n: number of letters
+        :type n: int
+        :return: bits
+        :rtype: float
+        """
+        h = 0.0
+        # Context -> probability of being in it after the letters so far
+        dist = {0: 1.0}
+        for _ in range(n):
+            following = {}
+            for ctx, p in dist.items():
+                for nxt, q, log_q in self._row(ctx):
+                    h -= p * q * log_q
+                    following[nxt] = following.get(nxt, 0.0) + p * q
+            dist = following
+        return h
+
+    def min_entropy(self, n):
+        """
+        Return the min-entropy of the passwords of a length, the bits of
+        the most likely one
+
+        :param n: number of letters
+        :type n: int
+        :return: bits
+        :rtype: float
+        """
+        if n <= 0:
+            return 0.0
+        with self._lock:
+            while len(self._min) < n and self._cycle is None:
+                following = {}
+                for ctx, b in self._best.items():
+                    for nxt, _, log_q in self._row(ctx):
+                        v = b + log_q
+                        if v > following.get(nxt, -math.inf):
+                            following[nxt] = v
+                self._best = following
+                top = max(following.values())
+                self._min.append(-top)
+                # The most likely ways of reaching the contexts relative to
+                # the best one. Once they repeat, every later letter repeats
+                # the letters since, each period adding the same bits.
+                shape = tuple(sorted((ctx, round(v - top, 9))
+                                     for ctx, v in following.items()))
+                k = len(self._min)
+                seen = self._shapes.get(shape)
+                if seen is not None:
+                    self._cycle = seen, k - seen, -top - self._min[seen - 1]
+                    self._shapes = None
+                elif len(self._shapes) < MAX_SHAPES:
+                    self._shapes[shape] = k
+            if n <= len(self._min):
+                return self._min[n - 1]
+            start, period, rise = self._cycle
+            q, r = divmod(n - start, period)
+            return self._min[start + r - 1] + q * rise
+
+    def length_for(self, target):
+        """
+        Return the shortest password reaching a min-entropy target
+
+        :param target: bits
+        :type target: float
+        :return: number of letters, at least 1
+        :rtype: int
+        """
+        # Every letter adds some, no letter is certain
+        n = 1
+        while self.min_entropy(n) < target:
+            n += 1
+        return n
+
+
+@lru_cache(maxsize=16)
+def pronounceable_model(source="nltk", order=ORDER):
+    """
+    Return the letter model of a word list source, trained on first use
+
+    :param source: "nltk" or a word list file, see rndplib.wordsource
+    :type source: str
+    :param order: number of letters a letter depends on
+    :type order: int
+    :raise LookupError: the nltk word list is not downloaded
+    :raise OSError: the word list file could not be read
+    :raise ValueError: the word list has no words of ASCII letters
+    :return: model
+    :rtype: MarkovModel
+    """
+    source = source or "nltk"
+    words = load_words(source)
+    try:
+        path = model_path(source_hash(source), order)
+    except OSError:
+        # The words are only kept in memory, so is the model
+        path = None
+    return cached("letter model", path, MarkovModel.load,
+                  lambda: MarkovModel.train(words, order),
+                  MarkovModel.save)
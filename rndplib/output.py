@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Project: RandomPass
+
+Copyright 2018, Korvin F. Ezüst
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Writing generated secrets
+
+Besides plain lines, secrets can be written as NUL-delimited records, CSV
+or JSON Lines with the type, length and entropy of each. The records of
+a chunk of items are joined into one string, encoded once and handed to
+the binary stream, which is buffered already, in a single write() call.
+"""
+
+from functools import partial
+from itertools import islice
+from json.encoder import encode_basestring_ascii
+from rndplib import instrument
+
+__author__ = "Korvin F. Ezüst"
+__copyright__ = "Copyright (c) 2018, Korvin F. Ezüst"
+__license__ = "Apache 2.0"
+__version__ = "1.0"
+__email__ = "dev@korvin.eu"
+__status__ = "Production"
+
+# Number of lines joined into a single write() call
+CHUNK_LINES = 1 << 14
+# Output formats, see write_items()
+FORMATS = ("lines", "nul", "csv", "jsonl")
+
+
+def write_lines(items, f, chunk_lines=CHUNK_LINES):
+    """
+    Write strings to a text stream, one per line, in large chunks
+
+    Only one chunk is held in memory at a time, so items can be an endless
+    generator.
+
+    :param items: strings to write
+    :type items: collections.abc.Iterable
+    :param f: text stream
+    :type f: io.TextIOBase
+    :param chunk_lines: number of lines per write() call
+    :type chunk_lines: int
+    """
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, chunk_lines))
+        if not chunk:
+            break
+        chunk.append("")
+        f.write("\n".join(chunk))
+
+
+def _write(f, s):
+    """Encode a string as UTF-8 and write it to a binary stream"""
+    data = s.encode("utf-8")
+    f.write(data)
+    if instrument.enabled:
+        instrument.count("bytes written", len(data))
+
+
+def _csv_field(s):
+    """Quote a CSV field if it has to be"""
+    if "," in s or '"' in s or "\n" in s or "\r" in s:
+        return '"' + s.replace('"', '""') + '"'
+    return s
+
+
+def _join(record, chunk):
+    """Return the records of a chunk of items as one string"""
+    return "".join(map(record, chunk))
+
+
+def formatter(fmt="lines", kind="password", entropy=None, hashed=False):
+    """
+    Return the header and the chunk function of an output format
+
+    :param fmt: one of FORMATS
+    :type fmt: str
+    :param kind: "password" or "passphrase", for csv and jsonl
+    :type kind: str
+    :param entropy: bits of entropy of each item, for csv and jsonl
+    :type entropy: float
+    :param hashed: items are (secret, hash) pairs, see
+        rndplib.hashing.iter_hashed()
+    :type hashed: bool
+    :raise ValueError: unknown format
+    :return: header, function(list of items) -> their records
+    :rtype: tuple
+    """
+    h = "" if entropy is None else f"{entropy:.2f}"
+    if fmt in ("lines", "nul"):
+        end = "\n" if fmt == "lines" else "\0"
+        if not hashed:
+            # No formatting, just join the items
+            return "", lambda chunk: end.join(chunk) + end
+
+        def record(item):
+            return f"{item[0]}\t{item[1]}{end}"
+        return "", partial(_join, record)
+    if fmt == "csv":
+        header = "type,length,entropy,secret" + (",hash" if hashed else "")
+        if hashed:
+            def record(item):
+                return (f"{kind},{len(item[0])},{h},{_csv_field(item[0])},"
+                        f"{item[1]}\r\n")
+        else:
+            def record(item):
+                return f"{kind},{len(item)},{h},{_csv_field(item)}\r\n"
+        return header + "\r\n", partial(_join, record)
+    if fmt == "jsonl":
+        # The fields shared by all records are formatted once
+        head = f'{{"type": "{kind}", "length": '
+        middle = f', "entropy": {h or "null"}, "secret": '
+        quote = encode_basestring_ascii
+        if hashed:
+            def record(item):
+                return (f'{head}{len(item[0])}{middle}{quote(item[0])}, '
+                        f'"hash": "{item[1]}"}}\n')
+        else:
+            def record(item):
+                return f"{head}{len(item)}{middle}{quote(item)}}}\n"
+        return "", partial(_join, record)
+    raise ValueError(f"unknown output format {fmt}")
+
+
+def write_items(items, f, fmt="lines", kind="password", entropy=None,
+                hashed=False):
+    """
+    Write secrets to a binary stream in an output format
+
+    Only a chunk of records is held in memory, so items can be an endless
+    generator.
+
+    :param items: secrets, or (secret, hash) pairs if hashed
+    :type items: collections.abc.Iterable
+    :param f: binary stream
+    :type f: io.BufferedIOBase
+    :param fmt: one of FORMATS
+    :type fmt: str
+    :param kind: "password" or "passphrase", for csv and jsonl
+    :type kind: str
+    :param entropy: bits of entropy of each item, for csv and jsonl
+    :type entropy: float
+    :param hashed: items are (secret, hash) pairs
+    :type hashed: bool
+    """
+    header, records = formatter(fmt, kind, entropy, hashed)
+    items = iter(items)
+    if header:
+        _write(f, header)
+    # Format a chunk of records at a time, one string per chunk
+    while True:
+        # Items are generated as they are pulled from the iterator
+        with instrument.stage("generate"):
+            chunk = list(islice(items, CHUNK_LINES))
+        if not chunk:
+            break
+        with instrument.stage("output"):
+            _write(f, records(chunk))
+        if instrument.enabled:
+            instrument.count("items", len(chunk))
+    f.flush()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Project: RandomPass
+
+Copyright 2018, Korvin F. Ezüst
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import multiprocessing
+import os
+import queue
+import time
+from rndplib.generator import word_index
+from rndplib.server import generate
+
+__author__ = "Korvin F. Ezüst"
+__copyright__ = "Copyright (c) 2018, Korvin F. Ezüst"
+__license__ = "Apache 2.0"
+__version__ = "1.0"
+__email__ = "dev@korvin.eu"
+__status__ = "Production"
+
+# Number of items a worker generates per shard
+SHARD_SIZE = 10000
+
+# Word list of the current process, loaded on first use, False if it
+# couldn't be loaded
+_words = None
+
+
+def worker_words():
+    """
+    Return the word list of the current process, load it on first use
+
+    :return: word list, or None if not available
+    :rtype: WordIndex or WordArray
+    """
+    global _words
+    if _words is None:
+        try:
+            _words = word_index()
+        except (ImportError, LookupError):
+            # nltk or its word list is missing, don't try again for
+            # every request, passwords still work
+            _words = False
+    return _words or None
+
+
+def worker_generate(req):
+    """
+    Generate the items of a request with the word list of the current
+    process, see rndplib.server.generate()
+
+    :param req: generation request
+    :type req: dict
+    :return: passwords or passphrases
+    :rtype: list
+    """
+    # Only passphrases and pronounceable passwords of the English word
+    # list need it
+    kind = req.get("type", "password")
+    words = worker_words() if kind != "password" and \
+        not req.get("wordlist") else None
+    return generate(req, words)
+
+
+def _shard(job):
+    """Generate one shard in a worker, report who did it and how long"""
+    req, count = job
+    start = time.perf_counter()
+    items = worker_generate(dict(req, count=count))
+    return os.getpid(), time.perf_counter() - start, items
+
+
+def iter_parallel(req, count, workers=None, ordered=True, stats=None):
+    """
+    Generate items in a pool of processes
+
+    The count is split into shards of SHARD_SIZE items. Each worker draws
+    from the OS CSPRNG on its own and the shards are streamed back to the
+    caller as they complete, in order if asked to. Only two shards per
+    worker are handed out at a time, so memory stays constant however
+    large the count and however slow the caller. Seeded requests give
+    the same items in the same order with ordered set.
+
+    :param req: generation request, see rndplib.server
+    :type req: dict
+    :param count: number of items
+    :type count: int
+    :param workers: number of processes, number of CPUs if None
+    :type workers: int
+    :param ordered: return shards in the order they were requested
+    :type ordered: bool
+    :param stats: fill with process id -> [items, seconds] if given
+    :type stats: dict
+    :return: passwords or passphrases
+    :rtype: collections.abc.Iterator
+    """
+    # Seeded shards take the index range of their items
+    start = int(req.get("start", 0))
+    shards = iter(range(0, count, SHARD_SIZE))
+    # Finished shards and errors, (first item, result) from the pool
+    done = queue.Queue()
+    # Shards handed out and not yet yielded, so neither the jobs nor the
+    # finished shards pile up when the caller is slower than the workers
+    window = 2 * (workers or os.cpu_count() or 1)
+    with multiprocessing.Pool(workers) as pool:
+
+        def submit():
+            """Hand the next shard to the pool, False if there is none"""
+            i = next(shards, None)
+            if i is None:
+                return False
+            job = dict(req, start=start + i), min(SHARD_SIZE, count - i)
+            pool.apply_async(_shard, (job,),
+                             callback=lambda r: done.put((i, r)),
+                             error_callback=lambda e: done.put((i, e)))
+            return True
+
+        outstanding = 0
+        while outstanding < window and submit():
+            outstanding += 1
+        # Shards finished before an earlier one, by first item
+        finished = {}
+        following = 0
+        while outstanding:
+            i, result = done.get()
+            if isinstance(result, BaseException):
+                raise result
+            finished[i] = result
+            while finished:
+                if not ordered:
+                    i = next(iter(finished))
+                elif following in finished:
+                    i = following
+                    following += SHARD_SIZE
+                else:
+                    break
+                pid, seconds, items = finished.pop(i)
+                outstanding -= 1
+                if submit():
+                    outstanding += 1
+                if stats is not None:
+                    s = stats.setdefault(pid, [0, 0.0])
+                    s[0] += len(items)
+                    s[1] += seconds
+                yield from items
+
+
+def format_stats(stats):
+    """
+    Describe the throughput of each worker
+
+    :param stats: process id -> [items, seconds], see iter_parallel()
+    :type stats: dict
+    :return: one line per worker
+    :rtype: str
+    """
+    lines = []
+    for pid, (items, seconds) in sorted(stats.items()):
+        rate = items / seconds if seconds else 0
+        lines.append(f"worker {pid}: {items} items in {seconds:.2f} s, "
+                     f"{rate:.0f} items/s")
+    return "\n".join(lines)
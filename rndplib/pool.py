@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Project: RandomPass
+
+Copyright 2018, Korvin F. Ezüst
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Pool of pre-generated secrets
+
+A profile is a generation request of rndplib.server without count, e.g.
+
+  {"type": "password", "preset": "alphanumeric", "number": 16}
+
+The pool keeps a bounded ring of ready secrets per profile and a background
+thread tops a ring up whenever it drops to the low-water mark, so handing
+out a secret is a queue pop. Every secret is handed out once. The pool
+keeps them as UTF-8 bytearrays and overwrites each with zeros when it's
+taken, the copy returned to the caller is the caller's to look after.
+"""
+
+from collections import deque
+import threading
+from rndplib.generator import word_index
+from rndplib.server import generate
+
+__author__ = "Korvin F. Ezüst"
+__copyright__ = "Copyright (c) 2018, Korvin F. Ezüst"
+__license__ = "Apache 2.0"
+__version__ = "1.0"
+__email__ = "dev@korvin.eu"
+__status__ = "Production"
+
+# Secrets kept ready per profile
+POOL_SIZE = 1024
+# Largest number of profiles, secrets of other profiles are generated
+# when asked for
+MAX_PROFILES = 64
+# Secrets generated per step of a refill, small enough not to hold up
+# take() for long
+REFILL_BATCH = 256
+
+
+def profile_key(req):
+    """
+    Return a hashable key of a profile
+
+    :param req: profile, a generation request
+    :type req: dict
+    :return: key
+    :rtype: tuple
+    """
+    extra = req.get("extra")
+    number = req.get("number")
+    return (req.get("type", "password"), req.get("preset", "default"),
+            None if number is None else int(number),
+            None if extra is None else tuple(extra), req.get("wordlist"),
+            req.get("length"), req.get("shortest"), req.get("longest"),
+            tuple(sorted(req.get("filters") or ())))
+
+
+def _wipe(buf):
+    """Overwrite a buffer with zeros"""
+    buf[:] = bytes(len(buf))
+
+
+class SecretPool:
+    """
+    Bounded rings of ready-made secrets, refilled in the background
+
+    :param size: secrets kept ready per profile
+    :type size: int
+    :param low_water: refill a ring when it has this many secrets or
+        fewer, a quarter of size if None
+    :type low_water: int
+    :param words: word list for passphrases, word_index() if None
+    :type words: list, WordIndex or WordArray
+    """
+
+    def __init__(self, size=POOL_SIZE, low_water=None, words=None):
+        if size <= 0:
+            raise ValueError("the pool size must be positive")
+        self.size = size
+        # A full ring must be above the mark
+        self.low_water = min(size // 4 if low_water is None else low_water,
+                             size - 1)
+        self.hits = 0
+        self.misses = 0
+        self._words = words
+        # Profile key -> (profile, ring of bytearrays)
+        self._rings = {}
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._refill, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _generate(self, req, count):
+        """Generate secrets of a profile"""
+        words = self._words
+        if req.get("type") == "passphrase" and not req.get("wordlist") \
+                and words is None:
+            words = self._words = word_index()
+        return generate(dict(req, count=count), words)
+
+    def add_profile(self, req):
+        """
+        Start keeping secrets of a profile ready
+
+        :param req: profile, a generation request
+        :type req: dict
+        :raise LookupError: the word list is not available
+        :raise ValueError: invalid profile or too many profiles
+        :return: key of the profile
+        :rtype: tuple
+        """
+        key = profile_key(req)
+        with self._cond:
+            if key in self._rings:
+                return key
+            if len(self._rings) >= MAX_PROFILES:
+                raise ValueError("too many profiles")
+        # Fail here rather than in the refill thread
+        self._generate(req, 1)
+        req = {k: v for k, v in req.items() if k not in ("count", "seed",
+                                                          "start")}
+        with self._cond:
+            self._rings.setdefault(key, (req, deque()))
+            self._cond.notify()
+        return key
+
+    def take(self, req):
+        """
+        Hand out a secret of a profile, add the profile on first use
+
+        A secret is generated on the spot if the ring is empty or the
+        profile can't be added, which counts as a miss.
+
+        :param req: profile, a generation request
+        :type req: dict
+        :return: password or passphrase
+        :rtype: str
+        """
+        key = profile_key(req)
+        buf = None
+        with self._cond:
+            entry = self._rings.get(key)
+            if entry is not None and entry[1]:
+                buf = entry[1].popleft()
+                self.hits += 1
+            else:
+                self.misses += 1
+            if entry is not None and len(entry[1]) <= self.low_water:
+                self._cond.notify()
+        if buf is not None:
+            secret = buf.decode("utf-8")
+            _wipe(buf)
+            return secret
+        if entry is None:
+            try:
+                self.add_profile(req)
+            except ValueError:
+                # Too many profiles, serve this one without a ring, or an
+                # invalid one, which generate() reports below
+                pass
+        return self._generate(req, 1)[0]
+
+    def stats(self):
+        """
+        Return the counters of the pool
+
+        :return: "hits", "misses", "profiles" and "ready" (secrets)
+        :rtype: dict
+        """
+        with self._cond:
+            return {"hits": self.hits, "misses": self.misses,
+                    "profiles": len(self._rings),
+                    "ready": sum(len(r) for _, r in self._rings.values())}
+
+    def _refill(self):
+        """Top up the rings at the low-water mark until closed"""
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    todo = [(req, ring) for req, ring in self._rings.values()
+                            if len(ring) <= self.low_water]
+                    if todo:
+                        break
+                    self._cond.wait()
+            for req, ring in todo:
+                try:
+                    self._fill(req, ring)
+                except (LookupError, OSError, ValueError):
+                    # E.g. the word list file is gone, stop keeping the
+                    # profile, take() reports the error
+                    with self._cond:
+                        self._rings.pop(profile_key(req), None)
+
+    def _fill(self, req, ring):
+        """Fill a ring up to size"""
+        # Only the refill thread adds, so the ring can't overflow
+        while not self._closed and len(ring) < self.size:
+            batch = self._generate(
+                req, min(REFILL_BATCH, self.size - len(ring)))
+            batch = [bytearray(s.encode("utf-8")) for s in batch]
+            with self._cond:
+                ring.extend(batch)
+
+    def close(self):
+        """Stop the refill thread and wipe the secrets not handed out"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        with self._cond:
+            for _, ring in self._rings.values():
+                while ring:
+                    _wipe(ring.popleft())
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Project: RandomPass
+
+Copyright 2018, Korvin F. Ezüst
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Deterministic datasets for testing, NOT for secrets
+
+Anyone who knows the seed can regenerate every item, so seeded passwords
+and passphrases must never be used as real credentials.
+
+Item k of a dataset draws its random numbers from SHAKE-256 of the seed
+and k, so any item can be regenerated on its own without the ones before
+it, and a dataset can be split into index ranges between workers. The
+same seed, settings and word list give the same items with every Python
+version. Character sets of more than 256 characters are read two bytes at
+a time in the byte order of the machine, so those passwords differ between
+little and big endian machines.
+"""
+
+import hashlib
+from rndplib.generator import expanded_passphrase, passphrase, password
+
+__author__ = "Korvin F. Ezüst"
+__copyright__ = "Copyright (c) 2018, Korvin F. Ezüst"
+__license__ = "Apache 2.0"
+__version__ = "1.0"
+__email__ = "dev@korvin.eu"
+__status__ = "Production"
+
+# Separates these streams from other uses of SHAKE-256 with the same seed
+_DOMAIN = b"RandomPass seeded v1\0"
+
+
+class SeededRandom:
+    """
+    Deterministic random numbers of one item of a seeded dataset
+
+    Implements the part of the random.Random interface used by the
+    generators, randbytes(), randrange(), choice() and sample(), so it can
+    be passed as their rng argument.
+
+    :param seed: seed of the dataset
+    :type seed: str or bytes
+    :param index: index of the item
+    :type index: int
+    """
+
+    def __init__(self, seed, index=0):
+        if isinstance(seed, str):
+            seed = seed.encode("utf-8")
+        if index < 0:
+            raise ValueError("index must not be negative")
+        self._shake = hashlib.shake_256(
+            _DOMAIN + len(seed).to_bytes(8, "big") + seed +
+            index.to_bytes(8, "big"))
+        self._stream = b""
+        self._pos = 0
+
+    def _read(self, size):
+        """Return the next size bytes of the stream"""
+        end = self._pos + size
+        if end > len(self._stream):
+            # The output of SHAKE only grows at the end, read twice as much
+            self._stream = self._shake.digest(max(64, 2 * end))
+        data = self._stream[self._pos:end]
+        self._pos = end
+        return data
+
+    def randbytes(self, size):
+        """Return size random bytes"""
+        return self._read(size)
+
+    def randrange(self, n):
+        """
+        Return a uniform integer from 0 to n, exclusive
+
+        :param n: upper bound
+        :type n: int
+        :raise ValueError: n is not positive
+        :return: random integer
+        :rtype: int
+        """
+        if n <= 0:
+            raise ValueError("empty range")
+        k = (n - 1).bit_length()
+        size = (k + 7) // 8
+        while True:
+            # Keep the top k bits, retry if out of range
+            r = int.from_bytes(self._read(size), "big") >> (8 * size - k)
+            if r < n:
+                return r
+
+    def choice(self, seq):
+        """Return a uniform element of a non-empty sequence"""
+        return seq[self.randrange(len(seq))]
+
+    def sample(self, population, k):
+        """
+        Return k distinct elements of a sequence in random order
+
+        :param population: sequence, e.g. a range
+        :type population: collections.abc.Sequence
+        :param k: number of elements
+        :type k: int
+        :raise ValueError: k is larger than the population
+        :return: elements
+        :rtype: list
+        """
+        n = len(population)
+        if not 0 <= k <= n:
+            raise ValueError("sample larger than population")
+        # Partial Fisher-Yates shuffle, only the swapped positions are kept
+        swapped = {}
+        out = []
+        for i in range(k):
+            j = i + self.randrange(n - i)
+            out.append(population[swapped.get(j, j)])
+            swapped[j] = swapped.get(i, i)
+        return out
+
+
+def seeded_password(seed, index, ch, n):
+    """
+    Regenerate item index of a seeded password dataset, NOT secret
+
+    :param seed: seed of the dataset
+    :type seed: str or bytes
+    :param index: index of the item
+    :type index: int
+    :param ch: character set
+    :type ch: str or Alphabet
+    :param n: number of characters
+    :type n: int
+    :return: password
+    :rtype: str
+    """
+    return password(ch, n, SeededRandom(seed, index))
+
+
+def seeded_passphrase(seed, index, w, n, cset=None):
+    """
+    Regenerate item index of a seeded passphrase dataset, NOT secret
+
+    :param seed: seed of the dataset
+    :type seed: str or bytes
+    :param index: index of the item
+    :type index: int
+    :param w: word list
+    :type w: list, WordIndex or WordArray
+    :param n: number of words
+    :type n: int
+    :param cset: mix in extra characters from this set, see
+        expanded_passphrase(), or None for plain passphrases
+    :type cset: list
+    :return: passphrase
+    :rtype: str
+    """
+    rng = SeededRandom(seed, index)
+    rd = passphrase(w, n, rng)
+    if cset is not None:
+        rd = expanded_passphrase(rd, n, cset, rng)
+    return rd
+
+
+def iter_seeded_passwords(seed, ch, n, start, count):
+    """
+    Generate items start to start + count of a seeded password dataset
+
+    :param seed: seed of the dataset
+    :type seed: str or bytes
+    :param ch: character set
+    :type ch: str or Alphabet
+    :param n: number of characters
+    :type n: int
+    :param start: index of the first item
+    :type start: int
+    :param count: number of passwords
+    :type count: int
+    :return: passwords
+    :rtype: collections.abc.Iterator
+    """
+    for k in range(start, start + count):
+        yield seeded_password(seed, k, ch, n)
+
+
+def iter_seeded_passphrases(seed, w, n, start, count, cset=None):
+    """
+    Generate items start to start + count of a seeded passphrase dataset
+
+    :param seed: seed of the dataset
+    :type seed: str or bytes
+    :param w: word list
+    :type w: list, WordIndex or WordArray
+    :param n: number of words
+    :type n: int
+    :param start: index of the first item
+    :type start: int
+    :param count: number of passphrases
+    :type count: int
+    :param cset: mix in extra characters from this set, see
+        expanded_passphrase(), or None for plain passphrases
+    :type cset: list
+    :return: passphrases
+    :rtype: collections.abc.Iterator
+    """
+    for k in range(start, start + count):
+        yield seeded_passphrase(seed, k, w, n, cset)
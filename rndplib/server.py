@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Project: RandomPass
+
+Copyright 2018, Korvin F. Ezüst
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Generation server on a Unix domain socket
+
+Requests and responses are JSON objects, one per line. A request looks like
+
+  {"type": "password", "preset": "hexadecimal", "number": 32, "count": 1,
+   "extra": null}
+
+where type is "password", "passphrase" or "pronounceable", preset is a key of
+rndplib.alphabet.PRESETS (only used for passwords) and extra is null, or a
+list of extra characters as with the -e option of the CLI. Passphrase
+requests may name a word list source with "wordlist", see
+rndplib.wordsource, limit the words with "shortest", "longest" and
+"filters", and ask for an exact number of characters with "length", in
+which case number is optional, see rndplib.lengthindex. With "seed" and
+"start" the items start to start + count of a deterministic, NOT secret
+dataset are returned instead, see rndplib.seeded. The response is
+{"result": [...]} or {"error": "..."}.
+
+Given a rndplib.pool.SecretPool, the server answers requests for a single
+secret from the pool.
+"""
+
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+from rndplib.engine import Generator
+from rndplib.generator import word_index
+from rndplib.wordindex import cache_dir
+
+__author__ = "Korvin F. Ezüst"
+__copyright__ = "Copyright (c) 2018, Korvin F. Ezüst"
+__license__ = "Apache 2.0"
+__version__ = "1.0"
+__email__ = "dev@korvin.eu"
+__status__ = "Production"
+
+# Largest number of items a single request may ask for
+MAX_COUNT = 1000000
+# Largest number of characters or words of an item over HTTP, see
+# rndplib.webservice
+MAX_NUMBER = 100000
+
+
+def socket_path():
+    """
+    Return the default path of the server socket
+
+    :return: path of the socket
+    :rtype: str
+    """
+    base = os.environ.get("XDG_RUNTIME_DIR") or cache_dir()
+    return os.path.join(base, "randompass.sock")
+
+
+def generate(req, words):
+    """
+    Generate the items asked for in a request
+
+    :param req: request, see the module docstring
+    :type req: dict
+    :param words: word list, or None if not available
+    :type words: list, WordIndex or WordArray
+    :return: passwords or passphrases
+    :rtype: list
+    """
+    n = req.get("number")
+    n = None if n is None else int(n)
+    length = req.get("length")
+    length = None if length is None else int(length)
+    count = int(req.get("count", 1))
+    seed = req.get("seed")
+    start = int(req.get("start", 0))
+    if (n is None and not length) or (n is not None and n <= 0) or \
+            not 0 < count <= MAX_COUNT:
+        raise ValueError("number and count must be positive")
+    if start < 0:
+        raise ValueError("start must not be negative")
+
+    kind = req.get("type", "password")
+    wordlist = req.get("wordlist")
+    if kind == "passphrase" and words is None and not wordlist:
+        raise LookupError("word list is not available")
+    lengths = None
+    if "shortest" in req or "longest" in req:
+        longest = req.get("longest")
+        lengths = (int(req.get("shortest", 1)),
+                   None if longest is None else int(longest))
+    gen = Generator(kind, n, req.get("preset", "default"), req.get("extra"),
+                    wordlist=wordlist, words=None if wordlist else words,
+                    total_length=length, word_lengths=lengths,
+                    word_filters=req.get("filters") or ())
+    if seed is not None:
+        return list(gen.generate_seeded(seed, start, count))
+    return list(gen.generate_many(count))
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Answer requests on a connection until the client closes it"""
+
+    def handle(self):
+        pool = self.server.pool
+        for line in self.rfile:
+            try:
+                req = json.loads(line)
+                if not isinstance(req, dict):
+                    raise TypeError("the request must be a JSON object")
+                if pool is not None and int(req.get("count", 1)) == 1 and \
+                        req.get("seed") is None:
+                    response = {"result": [pool.take(req)]}
+                else:
+                    response = {"result": generate(req, self.server.words)}
+            except (KeyError, LookupError, OSError, TypeError,
+                    ValueError) as e:
+                response = {"error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def serve(path=None, pool=None):
+    """
+    Load the word list once and answer requests until interrupted
+
+    :param path: path of the socket, socket_path() if None
+    :type path: str
+    :param pool: pool to hand out single secrets from, closed when the
+        server stops
+    :type pool: SecretPool
+    """
+    path = path or socket_path()
+    try:
+        words = word_index()
+    except (ImportError, LookupError):
+        # Passwords still work without nltk or the word list
+        words = None
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Remove the socket left behind by a previous server
+    if os.path.exists(path):
+        os.unlink(path)
+    # Clean up the socket on kill as well
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit())
+    # Only the owner may connect, the secrets and any readable wordlist
+    # file go to whoever does. The socket is created with that mode, so
+    # there is no window to connect before it's fixed.
+    umask = os.umask(0o077)
+    try:
+        server = _Server(path, _Handler)
+    finally:
+        os.umask(umask)
+    with server:
+        server.words = words
+        server.pool = pool
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(path)
+            if pool is not None:
+                pool.close()
+
+
+def request(req, path=None, timeout=10):
+    """
+    Send a request to a running server
+
+    :param req: request, see the module docstring
+    :type req: dict
+    :param path: path of the socket, socket_path() if None
+    :type path: str
+    :param timeout: seconds to wait for the server
+    :type timeout: float
+    :raise OSError: no server is running
+    :raise ValueError: the server could not answer the request
+    :return: passwords or passphrases
+    :rtype: list
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path or socket_path())
+        sock.sendall(json.dumps(req).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            response = json.loads(f.readline())
+    if "error" in response:
+        raise ValueError(response["error"])
+    return response["result"]
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Project: RandomPass
+
+Copyright 2018, Korvin F. Ezüst
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Bulk generation of passwords that are unique within a run
+
+Every password is packed into a 64-bit integer and kept in an open
+addressing hash table backed by array("Q"), 16 bytes per password instead
+of a Python str in a set. Passwords with more than 64 bits of entropy are
+stored by a 64-bit BLAKE2b fingerprint, where a false match only throws
+away a fresh password. Previously issued passwords can be excluded with a
+Bloom filter, which may also throw away a fresh one but never lets an
+issued one through.
+"""
+
+from array import array
+from itertools import product
+import hashlib
+import math
+import struct
+from rndplib.alphabet import Alphabet, from_chars
+from rndplib.generator import iter_passwords, system_random
+
+__author__ = "Korvin F. Ezüst"
+__copyright__ = "Copyright (c) 2018, Korvin F. Ezüst"
+__license__ = "Apache 2.0"
+__version__ = "1.0"
+__email__ = "dev@korvin.eu"
+__status__ = "Production"
+
+_MASK = (1 << 64) - 1
+# Fibonacci hashing multiplier, 2 ** 64 / golden ratio
+_GOLDEN = 0x9E3779B97F4A7C15
+_BLOOM_HEADER = struct.Struct("<4sIQ")
+_BLOOM_MAGIC = b"RPBF"
+# Password spaces up to this size are listed when issued passwords or a
+# large count could make drawing until a new one turns up take forever
+ENUMERATE_LIMIT = 1 << 16
+# Draws in a row without a new password before giving up on the rest
+MAX_MISSES = 100000
+
+
+class PackedSet:
+    """
+    Set of integers below 2 ** 64 - 1 in an open addressing hash table
+
+    :param capacity: expected number of items
+    :type capacity: int
+    """
+
+    def __init__(self, capacity=1024):
+        # Keep the table at most half full
+        size = 1 << max(4, math.ceil(math.log2(max(capacity, 1) * 2)))
+        self._table = array("Q", bytes(8 * size))
+        self._shift = 64 - size.bit_length() + 1
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def nbytes(self):
+        """Memory used by the table in bytes"""
+        return self._table.itemsize * len(self._table)
+
+    def add(self, key):
+        """
+        Add an integer
+
+        :param key: integer, 0 <= key < 2 ** 64 - 1
+        :type key: int
+        :return: False if it was already in the set
+        :rtype: bool
+        """
+        # 0 marks an empty slot
+        key += 1
+        table = self._table
+        mask = len(table) - 1
+        i = ((key * _GOLDEN) & _MASK) >> self._shift
+        while True:
+            slot = table[i]
+            if slot == key:
+                return False
+            if not slot:
+                break
+            i = (i + 1) & mask
+        table[i] = key
+        self._len += 1
+        if 2 * self._len > len(table):
+            self._grow()
+        return True
+
+    def _grow(self):
+        """Double the table"""
+        old = self._table
+        self._table = array("Q", bytes(16 * len(old)))
+        self._shift -= 1
+        self._len = 0
+        for key in old:
+            if key:
+                self.add(key - 1)
+
+
+class BloomFilter:
+    """
+    Bloom filter of strings
+
+    :param size: number of bits
+    :type size: int
+    :param hashes: number of hash functions
+    :type hashes: int
+    """
+
+    def __init__(self, size, hashes):
+        self.size = max(8, size)
+        self.hashes = max(1, hashes)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity, error_rate=1e-6):
+        """
+        Return a filter sized for a number of items and false positive rate
+
+        :param capacity: expected number of items
+        :type capacity: int
+        :param error_rate: false positive rate at capacity
+        :type error_rate: float
+        :return: empty filter
+        :rtype: BloomFilter
+        """
+        capacity = max(1, capacity)
+        size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        hashes = round(size / capacity * math.log(2))
+        return cls(size, hashes)
+
+    def _positions(self, item):
+        """Bit positions of an item, by double hashing"""
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16)
+        h1, h2 = struct.unpack("<QQ", digest.digest())
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        """Add a string"""
+        for p in self._positions(item):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[p >> 3] & (1 << (p & 7))
+                   for p in self._positions(item))
+
+    def save(self, path):
+        """Write the filter to a file"""
+        with open(path, "wb") as f:
+            f.write(_BLOOM_HEADER.pack(_BLOOM_MAGIC, self.hashes, self.size))
+            f.write(self.bits)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a filter written by save()
+
+        :param path: path of the file
+        :type path: str
+        :raise ValueError: not a filter file
+        :return: filter
+        :rtype: BloomFilter
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        try:
+            magic, hashes, size = _BLOOM_HEADER.unpack_from(data)
+        except struct.error:
+            magic = b""
+        if magic != _BLOOM_MAGIC:
+            raise ValueError(f"{path} is not a RandomPass Bloom filter")
+        bloom = cls(size, hashes)
+        bloom.bits[:] = data[_BLOOM_HEADER.size:]
+        return bloom
+
+    @classmethod
+    def from_file(cls, path, error_rate=1e-6):
+        """
+        Build a filter of the lines of a text file, or load a saved one
+
+        :param path: issued passwords, one per line, or a saved filter
+        :type path: str
+        :param error_rate: false positive rate
+        :type error_rate: float
+        :return: filter
+        :rtype: BloomFilter
+        """
+        try:
+            return cls.load(path)
+        except (ValueError, UnicodeDecodeError):
+            pass
+        with open(path, encoding="utf-8") as f:
+            count = sum(1 for _ in f)
+        bloom = cls.for_capacity(count, error_rate)
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                bloom.add(line.rstrip("\n"))
+        return bloom
+
+
+def encoder(alpha, n):
+    """
+    Return a function packing passwords of an alphabet into integers
+
+    Passwords are encoded exactly as base len(alpha) numbers when they fit
+    in 64 bits, otherwise they are fingerprinted.
+
+    :param alpha: alphabet
+    :type alpha: Alphabet
+    :param n: number of characters
+    :type n: int
+    :return: function(password) -> integer below 2 ** 64 - 1
+    :rtype: collections.abc.Callable
+    """
+    k = len(alpha)
+    if k ** n < _MASK:
+        if k <= 256 and n <= 8:
+            # Character -> its index as a byte, the bytes are the number
+            table = {ord(c): i for i, c in enumerate(alpha.chars)}
+            return lambda p: int.from_bytes(
+                p.translate(table).encode("latin-1"), "big")
+        index = {c: i for i, c in enumerate(alpha.chars)}
+
+        def encode(p):
+            value = 0
+            for c in p:
+                value = value * k + index[c]
+            return value
+        return encode
+
+    def fingerprint(p):
+        digest = hashlib.blake2b(p.encode("utf-8"), digest_size=8).digest()
+        # Keep clear of 2 ** 64 - 1
+        return int.from_bytes(digest, "big") >> 1
+    return fingerprint
+
+
+def iter_unique_passwords(ch, n, count, issued=None, stats=None):
+    """
+    Generate passwords that are unique within the run
+
+    :param ch: character set
+    :type ch: str or Alphabet
+    :param n: number of characters
+    :type n: int
+    :param count: number of passwords
+    :type count: int
+    :param issued: passwords to leave out
+    :type issued: BloomFilter
+    :param stats: fill with "generated", "duplicates", "issued",
+        "shortfall" and "memory" (bytes) if given
+    :type stats: dict
+    :raise ValueError: there are fewer possible passwords than count,
+        issued ones left out where the space is small enough to list
+    :return: passwords, fewer than count if MAX_MISSES draws in a row
+        brought no new one, the shortfall is in stats
+    :rtype: collections.abc.Iterator
+    """
+    alpha = ch if isinstance(ch, Alphabet) else from_chars(ch)
+    space = len(alpha) ** n
+    # Check here, not on the first next() of the generator
+    if space < count:
+        raise ValueError("not enough possible passwords")
+    if stats is None:
+        stats = {}
+    if space <= ENUMERATE_LIMIT and (issued is not None or
+                                     2 * count > space):
+        return _sample_unique(alpha, n, count, issued, stats)
+    return _iter_unique(alpha, n, count, issued, stats)
+
+
+def _sample_unique(alpha, n, count, issued, stats):
+    """Pick from a list of every password not issued yet"""
+    fresh = ["".join(p) for p in product(alpha.chars, repeat=n)]
+    stats.update(generated=0, duplicates=0, shortfall=0,
+                 issued=len(fresh))
+    if issued is not None:
+        fresh = [p for p in fresh if p not in issued]
+    stats["issued"] -= len(fresh)
+    if len(fresh) < count:
+        raise ValueError("not enough possible passwords left after the "
+                         "issued ones")
+    stats["generated"] = count
+    stats["memory"] = len(issued.bits) if issued is not None else 0
+    return iter(system_random.sample(fresh, count))
+
+
+def _iter_unique(alpha, n, count, issued, stats):
+    """Generator behind iter_unique_passwords()"""
+    seen = PackedSet(count)
+    encode = encoder(alpha, n)
+    stats.update(generated=0, duplicates=0, issued=0, shortfall=0)
+    left = count
+    misses = 0
+    while left > 0 and misses < MAX_MISSES:
+        # Ask for a few more than needed to make up for duplicates
+        for p in iter_passwords(alpha, n, left + left // 64 + 16):
+            stats["generated"] += 1
+            if issued is not None and p in issued:
+                stats["issued"] += 1
+                misses += 1
+            elif not seen.add(encode(p)):
+                stats["duplicates"] += 1
+                misses += 1
+            else:
+                left -= 1
+                misses = 0
+                yield p
+                if not left:
+                    break
+            if misses >= MAX_MISSES:
+                break
+    # Nearly every password left is issued or taken, report the rest
+    stats["shortfall"] = left
+    stats["memory"] = seen.nbytes + (
+        len(issued.bits) if issued is not None else 0)
+
+
+def format_stats(stats):
+    """
+    Describe a run of iter_unique_passwords()
+
+    :param stats: statistics filled by iter_unique_passwords()
+    :type stats: dict
+    :return: one line summary
+    :rtype: str
+    """
+    generated = stats["generated"] or 1
+    text = (f"{stats['generated']} generated, {stats['duplicates']} "
+            f"duplicates ({100 * stats['duplicates'] / generated:.4f}%), "
+            f"{stats['issued']} previously issued, "
+            f"{stats.get('memory', 0)} bytes of dedup memory")
+    if stats.get("shortfall"):
+        text += (f", gave up on {stats['shortfall']} after {MAX_MISSES} "
+                 f"draws without a new password")
+    return text
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Project: RandomPass
+
+Copyright 2018, Korvin F. Ezüst
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+HTTP generation service
+
+  GET /password?number=16&preset=alphanumeric&count=1&extra=%23%24
+  GET /passphrase?number=6&count=1&extra=
+  GET /passphrase?length=32&shortest=4&longest=8&filter=lower
+  POST /  with a JSON request body as described in rndplib.server
+
+The extra parameter works like the -e option of the CLI: leave it out for
+no extra characters, leave it empty for ASCII punctuation marks. filter
+can be given more than once, see rndplib.lengthindex. Responses are JSON,
+{"result": [...]} or {"error": "..."}. Connections are kept alive and
+pipelined requests are answered in order. Requests above BATCH_THRESHOLD
+characters or words run in a bounded process pool so a huge batch can't
+hold up small requests, requests above MAX_WORK are refused.
+
+Run it with python -m rndplib.webservice.
+"""
+
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+from urllib.parse import parse_qs, urlsplit
+from rndplib.parallel import worker_generate, worker_words
+from rndplib.server import MAX_NUMBER
+
+__author__ = "Korvin F. Ezüst"
+__copyright__ = "Copyright (c) 2018, Korvin F. Ezüst"
+__license__ = "Apache 2.0"
+__version__ = "1.0"
+__email__ = "dev@korvin.eu"
+__status__ = "Production"
+
+# Requests asking for more characters or words than this in total run in
+# the process pool
+BATCH_THRESHOLD = 10000
+# Largest number of characters or words one request may ask for in total
+MAX_WORK = 10000000
+# Largest accepted request body in bytes
+MAX_BODY = 1 << 16
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found",
+            405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+def _parse_query(path, query):
+    """
+    Turn a GET request into a generation request
+
+    :param path: request path
+    :type path: str
+    :param query: query string
+    :type query: str
+    :return: generation request
+    :rtype: dict
+    """
+    params = parse_qs(query, keep_blank_values=True)
+    req = {"type": path.strip("/")}
+    for key in ("number", "count", "preset", "length", "shortest",
+                "longest"):
+        if key in params:
+            req[key] = params[key][0]
+    if "extra" in params:
+        req["extra"] = list(params["extra"][0])
+    if "filter" in params:
+        req["filters"] = params["filter"]
+    return req
+
+
+class WebService:
+    """
+    HTTP server answering generation requests
+
+    :param workers: size of the process pool for batch requests
+    :type workers: int
+    """
+
+    def __init__(self, workers=None):
+        self.pool = ProcessPoolExecutor(workers or os.cpu_count())
+
+    async def respond(self, req):
+        """
+        Generate the items of a request, in the pool if it's large
+
+        :param req: generation request
+        :type req: dict
+        :return: HTTP status and response object
+        :rtype: tuple
+        """
+        if not isinstance(req, dict):
+            return 400, {"error": "the request must be a JSON object"}
+        # Don't let clients read arbitrary files of the server
+        if "wordlist" in req:
+            return 400, {"error": "wordlist is not supported over HTTP"}
+        try:
+            size = int(req.get("number") or req.get("length"))
+            # Don't let one request build a huge string
+            if size > MAX_NUMBER or int(req.get("length") or 0) > MAX_NUMBER:
+                return 400, {"error": f"number and length can't be more "
+                                      f"than {MAX_NUMBER}"}
+            work = size * int(req.get("count", 1))
+            if work > MAX_WORK:
+                return 400, {"error": f"number times count can't be more "
+                                      f"than {MAX_WORK}"}
+            if work > BATCH_THRESHOLD:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(
+                    self.pool, worker_generate, req)
+            else:
+                result = worker_generate(req)
+        except (KeyError, LookupError, TypeError, ValueError) as e:
+            return 400, {"error": f"{type(e).__name__}: {e}"}
+        return 200, {"result": result}
+
+    async def handle(self, reader, writer):
+        """Answer requests on a connection until it's closed"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    method, target, version = line.decode(
+                        "latin-1").split()
+                except ValueError:
+                    await self.send(writer, 400, {"error": "bad request"},
+                                    False)
+                    break
+                # Read headers
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    await self.send(writer, 413, {"error": "too large"},
+                                    False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                # HTTP/1.1 keeps connections alive unless asked otherwise
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" or (
+                    version == "HTTP/1.1" and connection != "close")
+
+                url = urlsplit(target)
+                if method == "GET" and url.path in ("/password",
+                                                    "/passphrase"):
+                    status, response = await self.respond(
+                        _parse_query(url.path, url.query))
+                elif method == "POST" and url.path == "/":
+                    try:
+                        req = json.loads(body)
+                    except ValueError:
+                        status, response = 400, {"error": "invalid JSON"}
+                    else:
+                        status, response = await self.respond(req)
+                elif url.path in ("/", "/password", "/passphrase"):
+                    status, response = 405, {"error": "method not allowed"}
+                else:
+                    status, response = 404, {"error": "not found"}
+                await self.send(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def send(writer, status, response, keep_alive):
+        """Write a JSON response"""
+        body = json.dumps(response).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"
+                f"\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host, port):
+        """Serve until cancelled"""
+        # Load the word list up front instead of on the first request,
+        # passwords still work if it's not available
+        worker_words()
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            try:
+                await server.serve_forever()
+            finally:
+                self.pool.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve passwords and passphrases over HTTP")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="address to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=8080,
+                        help="port to listen on (default: %(default)s)")
+    parser.add_argument("--workers", type=int,
+                        help="processes for batch requests (default: number "
+                             "of CPUs)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(WebService(args.workers).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Project: RandomPass
+
+Copyright 2018, Korvin F. Ezüst
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from array import array
+import mmap
+import os
+import struct
+import sys
+from rndplib import instrument
+
+__author__ = "Korvin F. Ezüst"
+__copyright__ = "Copyright (c) 2018, Korvin F. Ezüst"
+__license__ = "Apache 2.0"
+__version__ = "1.0"
+__email__ = "dev@korvin.eu"
+__status__ = "Production"
+
+# Index file layout, all integers little-endian:
+#   header   magic, format version, number of words
+#   offsets  number of words + 1 unsigned 32-bit offsets into the blob
+#   blob     every word UTF-8 encoded, back to back
+MAGIC = b"RPWI"
+VERSION = 1
+_HEADER = struct.Struct("<4sII")
+_SPAN = struct.Struct("<II")
+
+
+def cache_dir():
+    """
+    Return the directory RandomPass keeps its generated files in
+
+    :return: path of the cache directory
+    :rtype: str
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "randompass")
+
+
+def index_path(name="words"):
+    """
+    Return the path of a word index in the cache directory
+
+    :param name: name of the word list
+    :type name: str
+    :return: path of the index file
+    :rtype: str
+    """
+    return os.path.join(cache_dir(), name + ".idx")
+
+
+def little_endian(a):
+    """
+    Return an array of integers in the little-endian order the cached
+    files use, swapping is its own inverse so this also reads them back
+
+    :param a: integers
+    :type a: array
+    :return: the array itself on a little-endian platform, a swapped copy
+        otherwise
+    :rtype: array
+    """
+    if sys.byteorder == "big":
+        a = array(a.typecode, a)
+        a.byteswap()
+    return a
+
+
+def write_atomic(path, chunks):
+    """
+    Write a file next to its final location and rename it into place, so
+    a reader never sees a half written file
+
+    :param path: path of the file
+    :type path: str
+    :param chunks: contents of the file
+    :type chunks: collections.abc.Iterable
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp, path)
+
+
+def cached(name, path, load, build, save, keep=None):
+    """
+    Load a file from the cache, build and save it if it's missing or
+    stale
+
+    :param name: name of the file for instrument stages
+    :type name: str
+    :param path: path of the file, None if it can't be cached
+    :type path: str
+    :param load: function(path) returning the result, raises OSError or
+        ValueError if the file is missing or stale
+    :type load: collections.abc.Callable
+    :param build: function() returning the contents to save
+    :type build: collections.abc.Callable
+    :param save: function(contents, path) writing the file
+    :type save: collections.abc.Callable
+    :param keep: function(contents) returning the result when the file
+        can't be written, the contents themselves if None
+    :type keep: collections.abc.Callable
+    :return: result
+    """
+    if path is not None:
+        try:
+            with instrument.stage(f"{name} load"):
+                return load(path)
+        except (OSError, ValueError):
+            pass
+    with instrument.stage(f"{name} build"):
+        contents = build()
+        if path is not None:
+            try:
+                save(contents, path)
+            except OSError:
+                # Read-only cache
+                path = None
+    if path is None:
+        # Keep the result in memory only
+        return keep(contents) if keep else contents
+    return load(path)
+
+
+def _pack(w):
+    """Return the offsets and the UTF-8 blob of a word list"""
+    blob = bytearray()
+    offsets = array("I", [0])
+    for i in w:
+        blob += i.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, blob
+
+
+def build_index(w, path):
+    """
+    Write a word list to a compact index file
+
+    The file is written with write_atomic(), so a reader never sees a half
+    written index.
+
+    :param w: word list
+    :type w: list
+    :param path: path of the index file
+    :type path: str
+    """
+    offsets, blob = _pack(w)
+    write_atomic(path, (_HEADER.pack(MAGIC, VERSION, len(offsets) - 1),
+                        little_endian(offsets).tobytes(), blob))
+
+
+class WordIndex:
+    """
+    Read-only word list backed by a memory-mapped index file
+
+    Words are decoded one at a time on lookup, so the list never has to
+    exist as Python strings. It supports len() and indexing, which is all
+    secrets.choice() needs.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, count = _HEADER.unpack_from(self._mm, 0)
+        except struct.error:
+            magic, version, count = b"", 0, 0
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not a RandomPass word index")
+        self._count = count
+        # Start of the blob, right after the offsets table
+        self._blob = _HEADER.size + 4 * (count + 1)
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("word index out of range")
+        start, end = _SPAN.unpack_from(self._mm, _HEADER.size + 4 * i)
+        return self._mm[self._blob + start:self._blob + end].decode("utf-8")
+
+    def close(self):
+        """Unmap the index file"""
+        self._mm.close()
+
+
+class WordArray:
+    """
+    Read-only word list packed in memory, for lists without an index file
+
+    The words are kept as one UTF-8 blob and an array of offsets, a few
+    bytes per word instead of a Python string each, and decoded one at a
+    time on lookup like WordIndex.
+
+    :param w: words
+    :type w: collections.abc.Iterable
+    """
+
+    def __init__(self, w):
+        offsets, blob = _pack(w)
+        self._offsets = offsets
+        self._blob = bytes(blob)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        count = len(self._offsets) - 1
+        if i < 0:
+            i += count
+        if not 0 <= i < count:
+            raise IndexError("word index out of range")
+        start, end = self._offsets[i], self._offsets[i + 1]
+        return self._blob[start:end].decode("utf-8")
+
+    @property
+    def nbytes(self):
+        """Memory used by the offsets and the blob in bytes"""
+        return self._offsets.itemsize * len(self._offsets) + len(self._blob)
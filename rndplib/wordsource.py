@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Project: RandomPass
+
+Copyright 2018, Korvin F. Ezüst
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Word list sources
+
+A source is either "nltk", the default English word list, or the path of a
+word list file. The loader is picked by the file extension, or explicitly
+with a "kind:path" prefix, e.g. "text:/usr/share/dict/words". Text and gzip
+loaders take one word per line. Diceware and EFF lists work as they are,
+since the dice numbers in front of the words are skipped. Lists are
+compiled into the packed index format of rndplib.wordindex once and cached
+by the SHA-256 of the source file.
+"""
+
+from functools import lru_cache
+import gzip
+import hashlib
+import os
+from rndplib.generator import word_index
+from rndplib.wordindex import (
+    build_index, cached, index_path, WordArray, WordIndex)
+
+__author__ = "Korvin F. Ezüst"
+__copyright__ = "Copyright (c) 2018, Korvin F. Ezüst"
+__license__ = "Apache 2.0"
+__version__ = "1.0"
+__email__ = "dev@korvin.eu"
+__status__ = "Production"
+
+# Loader kind -> function(path) returning words
+LOADERS = {}
+# File extension -> loader kind
+EXTENSIONS = {}
+
+
+def register(kind, extensions=()):
+    """
+    Register a word list loader
+
+    :param kind: name of the loader, usable as a "kind:" prefix
+    :type kind: str
+    :param extensions: file extensions handled by the loader
+    :type extensions: tuple
+    :return: decorator
+    :rtype: collections.abc.Callable
+    """
+    def decorator(func):
+        LOADERS[kind] = func
+        for ext in extensions:
+            EXTENSIONS[ext] = kind
+        return func
+    return decorator
+
+
+def _parse_lines(lines):
+    """Return the words of a list, one per line, dice numbers skipped"""
+    w = []
+    for line in lines:
+        fields = line.split()
+        # Skip empty lines and the comments of a signed Diceware file
+        if not fields or fields[0].startswith(("#", "-----")):
+            continue
+        # Diceware and EFF lists start each line with the dice numbers
+        if len(fields) == 2 and fields[0].isdigit():
+            w.append(fields[1])
+        elif len(fields) == 1:
+            w.append(fields[0])
+    return w
+
+
+@register("text", (".txt", ".lst", ".asc"))
+def load_text(path):
+    """
+    Load a plain text word list
+
+    :param path: path of the file
+    :type path: str
+    :return: words
+    :rtype: list
+    """
+    with open(path, encoding="utf-8") as f:
+        return _parse_lines(f)
+
+
+@register("gzip", (".gz",))
+def load_gzip(path):
+    """
+    Load a gzip compressed text word list
+
+    :param path: path of the file
+    :type path: str
+    :return: words
+    :rtype: list
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return _parse_lines(f)
+
+
+@register("packed", (".idx",))
+def load_packed(path):
+    """
+    Load a word list in the packed index format
+
+    :param path: path of the file
+    :type path: str
+    :return: words
+    :rtype: WordIndex
+    """
+    return WordIndex(path)
+
+
+def _split(source):
+    """Return the loader kind and path of a source"""
+    kind, sep, path = source.partition(":")
+    if sep and kind in LOADERS:
+        return kind, path
+    ext = os.path.splitext(source)[1].lower()
+    return EXTENSIONS.get(ext, "text"), source
+
+
+def absolute_source(source):
+    """
+    Return a source with its file path made absolute, so it names the same
+    file in a process with another working directory
+
+    :param source: "nltk" or a word list file, see the module docstring
+    :type source: str
+    :return: source
+    :rtype: str
+    """
+    if not source or source == "nltk":
+        return source
+    kind, sep, path = source.partition(":")
+    if sep and kind in LOADERS:
+        return f"{kind}:{os.path.abspath(path)}"
+    return os.path.abspath(source)
+
+
+def file_hash(path):
+    """
+    Return the SHA-256 of a file
+
+    :param path: path of the file
+    :type path: str
+    :return: hex digest
+    :rtype: str
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def source_hash(source="nltk"):
+    """
+    Return the SHA-256 of the file the words of a source are read from,
+    the index of the English word list for "nltk"
+
+    :param source: "nltk" or a word list file, see the module docstring
+    :type source: str
+    :raise OSError: the file could not be read
+    :return: hex digest
+    :rtype: str
+    """
+    if not source or source == "nltk":
+        return file_hash(index_path())
+    return file_hash(_split(source)[1])
+
+
+@lru_cache(maxsize=16)
+def load_words(source="nltk"):
+    """
+    Return the words of a source, compiled into a cached index
+
+    :param source: "nltk" or a word list file, see the module docstring
+    :type source: str
+    :raise LookupError: the nltk word list is not downloaded
+    :raise OSError: the file could not be read
+    :raise ValueError: the file has no words
+    :return: words
+    :rtype: WordIndex or WordArray
+    """
+    if not source or source == "nltk":
+        return word_index()
+    kind, path = _split(source)
+    if kind == "packed":
+        return LOADERS[kind](path)
+
+    def build():
+        """Read the words, duplicates removed so none is more likely"""
+        w = list(dict.fromkeys(LOADERS[kind](path)))
+        if not w:
+            raise ValueError(f"no words in {path}")
+        return w
+
+    # Compile once per file content
+    cache = index_path(f"{kind}-{file_hash(path)}")
+    return cached("word list index", cache, WordIndex, build, build_index,
+                  WordArray)
+
+
+def export_packed(source, path):
+    """
+    Write the words of a source to a file in the packed index format
+
+    :param source: "nltk" or a word list file, see the module docstring
+    :type source: str
+    :param path: path of the packed file
+    :type path: str
+    """
+    build_index(list(load_words(source)), path)